@@ -0,0 +1,34 @@
+# coding=utf-8
+# instructions changing program counter by jump to label
+JUMPS = frozenset(('JUMP', 'JUMPIFEQ', 'JUMPIFNEQ', 'JUMPIFEQS', 'JUMPIFNEQS'))
+
+# instructions ending basic block, next instruction is entered by jump, call or return
+TERMINATORS = JUMPS | frozenset(('CALL', 'RETURN'))
+# instructions printing state, they are single blocks charged exactly by themselves
+EXACT = frozenset(('BREAK', 'DPRINT', 'GROOT'))
+
+
+def split_blocks(instructions):
+    # type: (list) -> list
+    # (start, end) of basic blocks, each starts on first instruction, label, after terminator or around exact
+    # instruction, so program could enter block only on its start
+    names = tuple(instruction.name for instruction in instructions)
+    leaders = {0} if names else set()
+    for i, name in enumerate(names):
+        if name == 'LABEL':
+            leaders.add(i)
+        elif name in EXACT:
+            leaders.add(i)
+            leaders.add(i + 1)
+        elif name in TERMINATORS:
+            leaders.add(i + 1)
+    starts = sorted(leader for leader in leaders if leader < len(names))
+    return list(zip(starts, starts[1:] + [len(names)]))
+
+
+def is_exact(instructions, start, end):
+    # type: (list, int, int) -> bool
+    return end - start == 1 and instructions[start].name in EXACT
+
+
+__all__ = ['JUMPS', 'TERMINATORS', 'EXACT', 'split_blocks', 'is_exact']
@@ -0,0 +1,228 @@
+# coding=utf-8
+import mmap
+import os
+import os.path as path
+import struct
+import sys
+from tempfile import mkstemp
+
+from .instruction import Instruction
+from .operand import Operand
+from .prices import InstructionPrices
+
+SUFFIX = '.ifjbc'
+
+# 8B magic, counts of instructions, operands, labels and constants, then tables of instructions (opcode, line index,
+# constant with text of line or none for text joined from opcode and operands, indexes of up to three operands
+# counted from 1, 0 for none),
+# unique operands (type, first and second constant, constant with text of operand), labels (constant with name,
+# index of instruction), offsets of constants relative to pool and the pool itself, each constant is tagged
+# by its type, all integers are little endian
+_MAGIC = b'IFJ17BC\x01'
+_HEADER = struct.Struct('<8sIIII')
+_INSTRUCTION = struct.Struct('<BxxxIIIII')
+_OPERAND = struct.Struct('<BxxxIII')
+_LABEL = struct.Struct('<II')
+_OFFSET = struct.Struct('<I')
+
+_NONE = 0xffffffff
+
+OPCODES = tuple(sorted(InstructionPrices.INSTRUCTIONS))
+_OPCODE_INDEXES = {name: index for index, name in enumerate(OPCODES)}
+
+_STR = 1
+_INT = 2
+_BOOL = 3
+_FLOAT = 4
+
+_DOUBLE = struct.Struct('<d')
+
+
+def _encode_constant(value):
+    # type: (object) -> bytes
+    if isinstance(value, str):
+        return bytes((_STR,)) + value.encode('utf-8', 'surrogatepass')
+    elif isinstance(value, bool):
+        return bytes((_BOOL, value))
+    elif isinstance(value, int):
+        return bytes((_INT,)) + value.to_bytes(value.bit_length() // 8 + 1, 'little', signed=True)
+    elif isinstance(value, float):
+        return bytes((_FLOAT,)) + _DOUBLE.pack(value)
+    raise ValueError('Unsupported constant {!r}.'.format(value))
+
+
+_CONSTANT_DECODERS = {
+    _STR: lambda data: str(data, encoding='utf-8', errors='surrogatepass'),
+    _INT: lambda data: int.from_bytes(data, 'little', signed=True),
+    _BOOL: lambda data: bool(data[0]),
+    _FLOAT: lambda data: _DOUBLE.unpack(data)[0],
+}
+
+
+def dumps(instructions):
+    # type: (list) -> bytes
+    constants = []
+    constant_indexes = {}  # encoded constant -> index, same constants are stored once
+    operand_table = []
+    operand_indexes = {}  # text of operand -> index from 1, operands with same text are same
+
+    def constant(value):
+        if value is None:
+            return _NONE
+        encoded = _encode_constant(value)
+        index = constant_indexes.get(encoded)
+        if index is None:
+            index = constant_indexes[encoded] = len(constants)
+            constants.append(encoded)
+        return index
+
+    def operand(text, spec):
+        index = operand_indexes.get(text)
+        if index is None:
+            type_, first, second = spec
+            operand_table.append(_OPERAND.pack(type_, constant(first), constant(second), constant(text)))
+            index = operand_indexes[text] = len(operand_table)
+        return index
+
+    instruction_table = []
+    label_table = []
+    for index, instruction in enumerate(instructions):
+        name, line_index, line, operands = instruction.to_spec()
+        texts = line.split()[1:]
+        indexes = [operand(text, spec) for text, spec in zip(texts, operands)]
+        indexes.extend([0] * (3 - len(indexes)))
+        instruction_table.append(_INSTRUCTION.pack(
+            _OPCODE_INDEXES.get(name),
+            line_index,
+            _NONE if line == _line(name, texts) else constant(line),
+            *indexes
+        ))
+        if name == 'LABEL':
+            label_table.append(_LABEL.pack(constant(operands[0][1]), index))
+
+    offsets = []
+    offset = 0
+    for encoded in constants:
+        offsets.append(_OFFSET.pack(offset))
+        offset += len(encoded)
+    offsets.append(_OFFSET.pack(offset))
+
+    return b''.join((
+        _HEADER.pack(_MAGIC, len(instruction_table), len(operand_table), len(label_table), len(constants)),
+        b''.join(instruction_table),
+        b''.join(operand_table),
+        b''.join(label_table),
+        b''.join(offsets),
+        b''.join(constants),
+    ))
+
+
+def _line(name, texts):
+    # type: (str, list) -> str
+    return ' '.join([name] + list(texts))
+
+
+def loads(data):
+    # type: (bytes) -> tuple
+    # instructions and labels of program from bytecode, fails with ValueError for invalid one,
+    # instructions share operand objects
+    try:
+        magic, instruction_count, operand_count, label_count, constant_count = _HEADER.unpack_from(data)
+        if magic != _MAGIC:
+            raise ValueError('Data are not IFJcode17 bytecode.')
+        start = _HEADER.size
+        tables = []
+        for table, count in (
+                (_INSTRUCTION, instruction_count), (_OPERAND, operand_count), (_LABEL, label_count),
+                (_OFFSET, constant_count + 1),
+        ):
+            end = start + table.size * count
+            tables.append(tuple(table.iter_unpack(data[start:end])))
+            start = end
+        instruction_table, operand_table, label_table, offsets = tables
+
+        # constants are decoded once for all their uses
+        constants = tuple(
+            _CONSTANT_DECODERS[data[start + offset]](data[start + offset + 1:start + end])
+            for (offset,), (end,) in zip(offsets, offsets[1:])
+        )
+        constant = dict(enumerate(constants))
+        constant[_NONE] = None
+        operands = [None] + [
+            Operand.from_spec((type_, constant[first], constant[second])) for type_, first, second, _ in operand_table
+        ]
+        texts = [None] + [constant[text] for _, _, _, text in operand_table]
+        instructions = []
+        for opcode, line_index, line, first, second, third in instruction_table:
+            name = OPCODES[opcode]
+            count = 3 if third else 2 if second else 1 if first else 0
+            indexes = (first, second, third)[:count]
+            instructions.append(Instruction.from_operands(
+                name,
+                line_index,
+                _line(name, [texts[index] for index in indexes]) if line == _NONE else constant[line],
+                [operands[index] for index in indexes]
+            ))
+        labels = {constant[name]: index for name, index in label_table}
+    except (struct.error, IndexError, KeyError) as e:
+        raise ValueError('Invalid IFJcode17 bytecode ({}).'.format(e))
+    return instructions, labels
+
+
+def dump(instructions, file):
+    # type: (list, str) -> None
+    data = dumps(instructions)
+    fd, temp_file = mkstemp(dir=path.dirname(path.abspath(file)))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        # temporary file is readable only by owner
+        os.chmod(temp_file, 0o644)
+        os.replace(temp_file, file)
+    except OSError:
+        os.remove(temp_file)
+        raise
+
+
+def load(file):
+    # type: (str) -> tuple
+    # instructions and labels of program from memory-mapped bytecode file
+    with open(file, 'rb') as f:
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # empty file
+            raise ValueError('File {} is not IFJcode17 bytecode.'.format(file))
+    try:
+        return loads(data)
+    finally:
+        data.close()
+
+
+def is_bytecode(file):
+    # type: (str) -> bool
+    with open(file, 'rb') as f:
+        return f.read(len(_MAGIC)) == _MAGIC
+
+
+def to_text(instructions):
+    # type: (list) -> str
+    # IFJcode17 with instructions on their original lines, so it is parsed to same program
+    lines = ['.IFJcode17']
+    for instruction in instructions:
+        _, line_index, line, _ = instruction.to_spec()
+        lines.extend([''] * (line_index - len(lines) - 1))
+        lines.append(line)
+    return '\n'.join(lines) + '\n'
+
+
+def main():
+    # python -m ifj2017.interpreter.bytecode <bytecode file>, prints program as IFJcode17
+    instructions, _ = load(sys.argv[1])
+    sys.stdout.write(to_text(instructions))
+
+
+__all__ = ['OPCODES', 'SUFFIX', 'dumps', 'loads', 'dump', 'load', 'is_bytecode', 'to_text']
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+# coding=utf-8
+import hashlib
+import logging
+import marshal
+import os
+import os.path as path
+from functools import lru_cache
+from glob import glob
+from tempfile import mkstemp
+
+import ifj2017
+from . import bytecode
+
+
+@lru_cache(maxsize=None)
+def hash_sources(package_dir):
+    # type: (str) -> str
+    # hash of python sources of package, so entries computed by locally changed code are not used
+    hash_ = hashlib.sha1()
+    for file in sorted(glob(path.join(package_dir, '*.py'))):
+        hash_.update(bytes('{}\0'.format(path.basename(file)), encoding='utf-8'))
+        with open(file, 'rb') as f:
+            hash_.update(f.read())
+    return hash_.hexdigest()
+
+
+# on-disk cache addressed by hash of key parts, each entry keeps data serialized by marshal,
+# least recently used entries are evicted when size of whole cache exceeds limit
+class FileCache(object):
+    FORMAT_VERSION = 1
+    SUFFIX = '.cache'
+    DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+    # packages, whose sources are part of key
+    SOURCES = (path.dirname(path.abspath(__file__)),)
+
+    def __init__(self, cache_dir, max_size=DEFAULT_MAX_SIZE):
+        # type: (str, int) -> None
+        self._cache_dir = cache_dir
+        self._max_size = max_size
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _entry_file(self, *key_parts):
+        # type: (str) -> str
+        key = hashlib.sha1()
+        key.update(bytes('{}:{}\0'.format(ifj2017.__version__, self.FORMAT_VERSION), encoding='utf-8'))
+        key.update(bytes(''.join('{}\0'.format(hash_sources(package_dir)) for package_dir in self.SOURCES),
+                         encoding='utf-8'))
+        key.update(bytes('\0'.join(key_parts), encoding='utf-8'))
+        return path.join(self._cache_dir, ''.join((key.hexdigest(), self.SUFFIX)))
+
+    def _load(self, entry_file):
+        # type: (str) -> object
+        try:
+            with open(entry_file, 'rb') as f:
+                data = marshal.loads(f.read())
+            # mark as recently used
+            os.utime(entry_file)
+        except OSError:
+            return None
+        except (EOFError, ValueError, TypeError) as e:
+            logging.warning('Removing corrupted cache entry {} ({}).'.format(entry_file, e))
+            self._remove(entry_file)
+            return None
+        return data
+
+    def _store(self, entry_file, data):
+        # type: (str, object) -> None
+        fd, temp_file = mkstemp(dir=self._cache_dir)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(marshal.dumps(data))
+            # atomic for concurrent readers
+            os.replace(temp_file, entry_file)
+        except OSError as e:
+            logging.warning('Unable to store cache entry ({}).'.format(e))
+            self._remove(temp_file)
+            return
+        self._evict()
+
+    def _evict(self):
+        entries = []
+        total_size = 0
+        for entry in os.scandir(self._cache_dir):
+            if not entry.name.endswith(self.SUFFIX):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total_size += stat.st_size
+
+        for _, size, entry_file in sorted(entries):
+            if total_size <= self._max_size:
+                break
+            self._remove(entry_file)
+            total_size -= size
+
+    @staticmethod
+    def _remove(file):
+        try:
+            os.remove(file)
+        except OSError:
+            pass
+
+
+# cache of parsed IFJcode17 programs addressed by hash of code, each entry keeps bytecode of program
+class ParseCache(FileCache):
+    FORMAT_VERSION = 2
+    SUFFIX = '.ifjc'
+
+    def load(self, code):
+        # type: (str) -> list
+        entry_file = self._entry_file(code)
+        data = self._load(entry_file)
+        if data is None:
+            return None
+        try:
+            instructions, _ = bytecode.loads(data)
+        except (ValueError, TypeError) as e:
+            logging.warning('Removing corrupted cache entry {} ({}).'.format(entry_file, e))
+            self._remove(entry_file)
+            return None
+        return instructions
+
+    def store(self, code, instructions):
+        # type: (str, list) -> None
+        self._store(self._entry_file(code), bytecode.dumps(instructions))
+
+
+__all__ = ['FileCache', 'ParseCache', 'hash_sources']
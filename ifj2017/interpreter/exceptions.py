@@ -4,6 +4,26 @@ class InterpreterStopException(RuntimeError):
     pass
 
 
+class ExecutionLimitError(RuntimeError):
+    # raised by run of interpreter with limits, state is kept as it was in moment of check
+    def __init__(self, state, limit):
+        super().__init__()
+        self.state = state
+        self.limit = limit
+
+
+class InstructionLimitError(ExecutionLimitError):
+    def __str__(self):
+        return 'Limit of {} executed instructions exceeded on line {}.'.format(self.limit, self.state.program_line)
+
+
+class TimeLimitError(ExecutionLimitError):
+    def __str__(self):
+        return 'Time limit {}s exceeded on line {} after {} executed instructions.'.format(
+            self.limit, self.state.program_line, self.state.executed_instructions
+        )
+
+
 class InvalidCodeException(ValueError):
     UNKNOWN_INSTRUCTION = 0
     INVALID_OPERAND = 1
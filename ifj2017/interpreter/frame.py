@@ -0,0 +1,69 @@
+# coding=utf-8
+
+
+class _Undeclared(object):
+    def __repr__(self):
+        return 'UNDECLARED'
+
+
+# marker of slot for variable not yet defined in frame
+UNDECLARED = _Undeclared()
+
+
+# frame of variables stored in flat list of slots, slot index of variable is given by layout shared by all frames
+# of same kind, provides dict-like view by names of defined variables for state dumps and debugger
+class Frame(object):
+    __slots__ = ('slots', '_layout', '_defined')
+
+    def __init__(self, layout, slots=None, defined=None):
+        # type: (dict, list, list) -> None
+        self._layout = layout  # name -> slot index
+        self.slots = slots if slots is not None else [UNDECLARED] * len(layout)
+        self._defined = defined if defined is not None else []  # names in order of definition
+
+    def define(self, name, slot):
+        # type: (str, int) -> None
+        self.slots[slot] = None
+        self._defined.append(name)
+
+    def copy(self):
+        return Frame(self._layout, list(self.slots), list(self._defined))
+
+    def __contains__(self, name):
+        slot = self._layout.get(name)
+        return slot is not None and self.slots[slot] is not UNDECLARED
+
+    def __getitem__(self, name):
+        if name not in self:
+            raise KeyError(name)
+        return self.slots[self._layout[name]]
+
+    def __setitem__(self, name, value):
+        slot = self._layout[name]
+        if self.slots[slot] is UNDECLARED:
+            self.define(name, slot)
+        self.slots[slot] = value
+
+    def get(self, name, default=None):
+        return self[name] if name in self else default
+
+    def keys(self):
+        return iter(self._defined)
+
+    def values(self):
+        return (self.slots[self._layout[name]] for name in self._defined)
+
+    def items(self):
+        return ((name, self.slots[self._layout[name]]) for name in self._defined)
+
+    def __iter__(self):
+        return self.keys()
+
+    def __len__(self):
+        return len(self._defined)
+
+    def __repr__(self):
+        return 'Frame({})'.format(', '.join('{}: {}'.format(k, v) for k, v in self.items()))
+
+
+__all__ = ['Frame', 'UNDECLARED']
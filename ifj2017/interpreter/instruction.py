@@ -4,8 +4,8 @@ import math
 import operator
 from inspect import getfullargspec
 
-from .exceptions import InvalidCodeException, BaseInterpreterError
-from .operand import Operand
+from .exceptions import InvalidCodeException, BaseInterpreterError, UnknownLabelError
+from .operand import Operand, TypeOperand
 from .prices import InstructionPrices
 from .state import State
 
@@ -35,7 +35,7 @@ def _operator_command(operator_):
     # type: (callable) -> callable
     def inner(state, op0, op1, op2):
         # type: (State, Operand, Operand, Operand) -> None
-        state.set_value(op0, operator_(state.get_value(op1), state.get_value(op2)))
+        op0.write(state, operator_(op1.read(state), op2.read(state)))
 
     return inner
 
@@ -46,7 +46,7 @@ def _operator_stack_command(operator_):
         # type: (State, Operand, Operand, Operand) -> None
         op2 = state.pop_stack()
         op1 = state.pop_stack()
-        logging.debug("Stack operation {} {} {}.".format(op1, operator_.__name__, op2))
+        logging.debug("Stack operation %s %s %s.", op1, operator_.__name__, op2)
         state.push_stack(operator_(op1, op2))
 
     return inner
@@ -88,10 +88,49 @@ class Instruction(object):
             e.line = line
             raise
 
+    @classmethod
+    def from_spec(cls, spec):
+        # type: (tuple) -> Instruction
+        # rebuilds already validated instruction from spec created by to_spec without any parsing
+        name, line_index, line, operands = spec
+        return cls.from_operands(name, line_index, line, tuple(Operand.from_spec(operand) for operand in operands))
+
+    @classmethod
+    def from_operands(cls, name, line_index, line, operands):
+        # type: (str, int, str, tuple) -> Instruction
+        # operands could be shared by more instructions, they are bound to same slots and targets
+        instruction = cls.__new__(cls)
+        instruction.name = name
+        instruction.line_index = line_index
+        instruction._line = line
+        for attr, operand in zip(('op0', 'op1', 'op2'), operands):
+            setattr(instruction, attr, operand)
+        return instruction
+
+    def to_spec(self):
+        # type: () -> tuple
+        return self.name, self.line_index, self._line, tuple(operand.to_spec() for operand in self.operands)
+
     @property
     def operands(self):
         return filter(None, (self.op0, self.op1, self.op2,))
 
+    def resolve_labels(self, labels, strict=False):
+        # type: (dict, bool) -> None
+        # binds label operands to indexes of instructions, unknown labels are reported on execution or now in strict
+        if self.name == 'LABEL':
+            return
+        for operand in self.operands:
+            if operand.type != TypeOperand.LABEL:
+                continue
+            target = labels.get(operand.label)
+            if target is None and strict:
+                e = UnknownLabelError(operand.label)
+                e.line_index = self.line_index
+                e.line = self._line
+                raise e
+            operand.bind_target(target)
+
     _commands = {
         'MOVE': State.set_value,
         'CREATEFRAME': State.create_frame,
@@ -132,48 +171,48 @@ class Instruction(object):
 
         'AND': _operator_command(operator.and_),
         'OR': _operator_command(operator.or_),
-        'NOT': lambda state, op0, op1: state.set_value(op0, not state.get_value(op1)),
+        'NOT': lambda state, op0, op1: op0.write(state, not op1.read(state)),
         'ANDS': _operator_stack_command(operator.and_),
         'ORS': _operator_stack_command(operator.or_),
         'NOTS': lambda state: state.push_stack(not state.pop_stack(None)),
 
         'READ': State.read,
-        'TYPE': lambda state, op0, op1: state.set_value(
-            op0,
-            type(state.get_value(op1)).__name__
-            if state.get_value(op1) is not None else ''
+        'TYPE': lambda state, op0, op1: op0.write(
+            state,
+            type(op1.read(state)).__name__
+            if op1.read(state) is not None else ''
         ),
 
         'BREAK': lambda state: state.stderr.write('{}\n'.format(state)),
-        'DPRINT': lambda state, op0: state.stderr.write('{}\n'.format(state.get_value(op0))),
+        'DPRINT': lambda state, op0: state.stderr.write('{}\n'.format(op0.read(state))),
         'GROOT': lambda state: state.stderr.write(
             'Price: {} ({}+{}).\n'.format(
                 state.price, state.instruction_price, state.operand_price
             )
         ),
 
-        'CONCAT': lambda state, target, op0, op1: state.set_value(target, ''.join((
-            state.get_value(op0),
-            state.get_value(op1),
+        'CONCAT': lambda state, target, op0, op1: target.write(state, ''.join((
+            op0.read(state),
+            op1.read(state),
         ))),
         'STRLEN': State.str_len,
         'GETCHAR': State.get_char,
         'SETCHAR': State.set_char,
 
-        'INT2FLOAT': lambda state, op0, op1: state.set_value(op0, float(state.get_value(op1))),
-        'FLOAT2INT': lambda state, op0, op1: state.set_value(op0, int(state.get_value(op1))),
-        'FLOAT2R2EINT': lambda state, op0, op1: state.set_value(
-            op0,
-            even_round(state.get_value(op1))
+        'INT2FLOAT': lambda state, op0, op1: op0.write(state, float(op1.read(state))),
+        'FLOAT2INT': lambda state, op0, op1: op0.write(state, int(op1.read(state))),
+        'FLOAT2R2EINT': lambda state, op0, op1: op0.write(
+            state,
+            even_round(op1.read(state))
         ),
-        'FLOAT2R2OINT': lambda state, op0, op1: state.set_value(
-            op0,
-            odd_round(state.get_value(op1))
+        'FLOAT2R2OINT': lambda state, op0, op1: op0.write(
+            state,
+            odd_round(op1.read(state))
         ),
-        'INT2CHAR': lambda state, to, what: state.set_value(to, chr(state.get_value(what))),
-        'STRI2INT': lambda state, to, what, index: state.set_value(
-            to,
-            ord(state.get_value(what)[state.get_value(index)])
+        'INT2CHAR': lambda state, to, what: to.write(state, chr(what.read(state))),
+        'STRI2INT': lambda state, to, what, index: to.write(
+            state,
+            ord(what.read(state)[index.read(state)])
         ),
 
         'INT2FLOATS': lambda state: state.push_stack(float(state.pop_stack())),
@@ -201,3 +240,37 @@ class Instruction(object):
         state.instruction_price += price
         state.executed_instructions += 1
         state.program_line = self.line_index
+
+    def compile(self, priced=True):
+        # type: (bool) -> callable
+        # resolves command, price and operands once, returned step has same effect on state as run,
+        # unpriced step does not charge instruction price, count of executed instructions and program line,
+        # those are charged by caller (for whole basic block), operand price is charged always
+        command = self._commands.get(self.name, _unknown_command)
+        price = InstructionPrices.INSTRUCTIONS.get(self.name)
+        operands = tuple(self.operands)
+        line_index = self.line_index
+        line = self._line
+
+        def step(state):
+            # type: (State) -> None
+            try:
+                command(state, *operands)
+            except BaseInterpreterError as e:
+                e.line_index = line_index
+                e.line = line
+                raise
+            state.instruction_price += price
+            state.executed_instructions += 1
+            state.program_line = line_index
+
+        def unpriced_step(state):
+            # type: (State) -> None
+            try:
+                command(state, *operands)
+            except BaseInterpreterError as e:
+                e.line_index = line_index
+                e.line = line
+                raise
+
+        return step if priced else unpriced_step
@@ -1,24 +1,79 @@
 # coding=utf-8
-
+from . import blocks, transpiler
 from .exceptions import InterpreterStopException, InvalidCodeException, BaseInterpreterError
 from .instruction import Instruction
+from .limits import Limits, UNLIMITED
+from .operand import TypeOperand
+from .prices import InstructionPrices
 from .state import State
 
 
 class Interpreter(object):
-    def __init__(self, code, state_kwargs=None):
-        # type: (str) -> None
+    ENGINE_STANDARD = 'standard'
+    ENGINE_COMPILED = 'compiled'
+    ENGINE_BLOCKS = 'blocks'  # compiled with instruction price charged once per basic block
+    ENGINE_TRANSPILED = 'transpiled'  # translated to Python function, standard for programs out of supported subset
+
+    ENGINES = (ENGINE_STANDARD, ENGINE_COMPILED, ENGINE_BLOCKS, ENGINE_TRANSPILED)
+
+    # hooks get state and program counter of instruction, call hooks also called label,
+    # post instruction hooks are called also for failed instruction, call and return hooks only after success
+    HOOK_PRE_INSTRUCTION = 'pre_instruction'
+    HOOK_POST_INSTRUCTION = 'post_instruction'
+    HOOK_CALL = 'call'
+    HOOK_RETURN = 'return'
+    HOOK_SAMPLE = 'sample'  # every N executed instructions
+
+    HOOKS = (HOOK_PRE_INSTRUCTION, HOOK_POST_INSTRUCTION, HOOK_CALL, HOOK_RETURN, HOOK_SAMPLE)
+
+    # programs with more distinct names of local variables keep local frames as dicts
+    MAX_LOCAL_SLOTS = 256
+
+    def __init__(self, code, state_kwargs=None, engine=ENGINE_STANDARD, parse_cache=None, strict_labels=False,
+                 bytecode=None):
+        # type: (str, dict, str, ParseCache, bool, tuple) -> None
+        # program loaded from bytecode as (instructions, labels) is used instead of code
+        if engine not in self.ENGINES:
+            raise ValueError('Unknown interpreter engine {}.'.format(engine))
         self._code = code
+        self._parse_cache = parse_cache
         self._instructions = []
-        self._load_code()
+        self._steps = None
+        self._blocks = None
+        self._program = None
+        self._transpiled = False
+        self._global_layout = {}
+        self._local_layout = {}
+        self._labels = {}
+        if bytecode is not None:
+            self._instructions, self._labels = bytecode
+        else:
+            self._load_code()
+            self._load_labels()
+        self._load_frame_layouts()
+        self._resolve_labels(strict_labels)
         self._state_kwargs = state_kwargs
+        self._engine = engine
+        self._hooks = {kind: [] for kind in self.HOOKS}  # sample hooks as (interval, callback)
         self._active = True
 
     def _load_code(self):
-        started = False
         if not self._code.strip():
             raise InvalidCodeException("Empty code")
 
+        if self._parse_cache:
+            cached = self._parse_cache.load(self._code)
+            if cached is not None:
+                self._instructions = cached
+                return
+
+        self._parse_code()
+        if self._parse_cache:
+            self._parse_cache.store(self._code, self._instructions)
+
+    def _parse_code(self):
+        started = False
+
         # _start from 1, .IFJcode17 striped
         for i, line in enumerate(self._code.splitlines(), start=1):
             line = line.strip().split('#', 1)[0].strip()  # naive method to strip comment?
@@ -38,24 +93,146 @@ class Interpreter(object):
 
             self._instructions.append(Instruction(line=line.strip(), line_index=i))
 
-    def _load_labels(self, state):
-        # type: (State) -> None
+    def _load_frame_layouts(self):
+        # every GF variable gets fixed slot in global frame, LF and TF variables share one layout for all
+        # local frames, because frame pushed by CALL could be accessed from any place of program
+        variables = tuple(
+            operand
+            for instruction in self._instructions
+            for operand in instruction.operands
+            if operand.type == TypeOperand.VARIABLE
+        )
+        for variable in variables:
+            layout = self._global_layout if variable.frame.upper() == 'GF' else self._local_layout
+            layout.setdefault(variable.name, len(layout))
+
+        if len(self._local_layout) > self.MAX_LOCAL_SLOTS:
+            self._local_layout = None
+
+        for variable in variables:
+            if variable.slot is not None:
+                # operand shared by more instructions
+                continue
+            if variable.frame.upper() == 'GF':
+                variable.bind_slot(self._global_layout.get(variable.name))
+            elif self._local_layout is not None:
+                variable.bind_slot(self._local_layout.get(variable.name))
+
+    def _load_labels(self):
         for index, instruction in enumerate(self._instructions):
             if instruction.name == 'LABEL':
-                state.labels[instruction.op0.label] = index
+                self._labels[instruction.op0.label] = index
+
+    def _resolve_labels(self, strict):
+        # type: (bool) -> None
+        # targets of jumps and calls are resolved once for all runs, unknown labels are in strict mode
+        # reported now, otherwise on execution
+        for instruction in self._instructions:
+            instruction.resolve_labels(self._labels, strict)
 
     def _prepare_state(self):
-        state = State(**(self._state_kwargs or {}))
+        state = State(
+            global_layout=self._global_layout,
+            local_layout=self._local_layout,
+            **(self._state_kwargs or {})
+        )
 
         state.program_line = self._instructions[0].line_index if self._instructions else -1
-        self._load_labels(state)
+        state.labels = self._labels
 
         return state, len(self._instructions)
 
-    def run(self):
+    def _compile(self):
+        # type: () -> tuple
+        if self._steps is None:
+            self._steps = tuple(instruction.compile() for instruction in self._instructions)
+        return self._steps
+
+    @property
+    def instructions(self):
+        # type: () -> tuple
+        return tuple(self._instructions)
+
+    def add_hook(self, kind, callback, interval=1):
+        # type: (str, callable, int) -> None
+        if kind not in self._hooks:
+            raise ValueError('Unknown interpreter hook {}.'.format(kind))
+        assert interval > 0, 'Interval of hook is positive int'
+        self._hooks[kind].append((interval, callback) if kind == self.HOOK_SAMPLE else callback)
+
+    def remove_hook(self, kind, callback):
+        # type: (str, callable) -> None
+        self._hooks[kind] = [
+            hook for hook in self._hooks[kind]
+            if (hook[1] if kind == self.HOOK_SAMPLE else hook) is not callback
+        ]
+
+    def _load_blocks(self):
+        # type: () -> tuple
+        # for each index of instruction (steps, instruction price, count, index of last instruction, line of last
+        # instruction, refunds, lines), refunds are prices of block suffixes for failed instructions,
+        # instructions out of block starts are single exact blocks
+        if self._blocks is not None:
+            return self._blocks
+
+        priced = self._compile()
+        table = [None] * len(self._instructions)
+        for start, end in blocks.split_blocks(self._instructions):
+            if blocks.is_exact(self._instructions, start, end):
+                continue
+            instructions = self._instructions[start:end]
+            prices = tuple(InstructionPrices.INSTRUCTIONS.get(instruction.name) for instruction in instructions)
+            table[start] = (
+                tuple(instruction.compile(priced=False) for instruction in instructions),
+                sum(prices),
+                end - start,
+                end - 1,
+                instructions[-1].line_index,
+                tuple(sum(prices[i:]) for i in range(len(prices))),
+                tuple(instruction.line_index for instruction in instructions),
+            )
+        for i, block in enumerate(table):
+            if block is None:
+                table[i] = self._exact_block(priced[i], i)
+        self._blocks = tuple(table)
+        return self._blocks
+
+    @staticmethod
+    def _exact_block(step, index):
+        # type: (callable, int) -> tuple
+        # single instruction charged by its priced step
+        return (step,), 0, 0, index, None, (0,), ()
+
+    def _transpile(self):
+        # type: () -> transpiler.TranspiledProgram
+        if not self._transpiled:
+            self._program = transpiler.transpile(self._instructions, self._global_layout, self._local_layout)
+            self._transpiled = True
+        return self._program
+
+    def run(self, instruction_limit=None, time_limit=None):
+        # type: (int, float) -> State
+        # limits are checked natively by each engine before instruction or basic block over budget,
+        # hooks are observed only by instrumented loop
+        limits = None
+        if instruction_limit is not None or time_limit is not None:
+            limits = Limits(instruction_limit, time_limit)
+        if any(self._hooks.values()):
+            return self._run_instrumented(limits)
+        return {
+            self.ENGINE_STANDARD: self._run_standard,
+            self.ENGINE_COMPILED: self._run_compiled,
+            self.ENGINE_BLOCKS: self._run_blocks,
+            self.ENGINE_TRANSPILED: self._run_transpiled,
+        }.get(self._engine)(limits)
+
+    def _run_standard(self, limits=None):
         state, program_length = self._prepare_state()
+        budget = limits.check(state) if limits else UNLIMITED
 
         while state.program_counter < program_length and self._active:
+            if state.executed_instructions >= budget:
+                budget = limits.check(state)
             program_counter = state.program_counter
             instruction = self._instructions[state.program_counter]  # type: Instruction
             try:
@@ -68,6 +245,137 @@ class Interpreter(object):
                 state.program_counter += 1
         return state
 
+    def _run_compiled(self, limits=None):
+        state, program_length = self._prepare_state()
+        steps = self._compile()
+        budget = limits.check(state) if limits else UNLIMITED
+
+        try:
+            while state.program_counter < program_length and self._active:
+                if state.executed_instructions >= budget:
+                    budget = limits.check(state)
+                program_counter = state.program_counter
+                steps[program_counter](state)
+
+                if program_counter == state.program_counter:
+                    # increment only in case of not manipulating with PC
+                    state.program_counter += 1
+        except InterpreterStopException:
+            pass
+        return state
+
+    def _run_blocks(self, limits=None):
+        state, program_length = self._prepare_state()
+        table = self._load_blocks()
+        priced = self._compile()
+        budget = limits.check(state) if limits else UNLIMITED
+
+        try:
+            while state.program_counter < program_length and self._active:
+                start = state.program_counter
+                steps, price, count, last, last_line, refunds, lines = table[start]
+                if state.executed_instructions + len(steps) > budget:
+                    budget = limits.check(state, len(steps))
+                    if state.executed_instructions + len(steps) > budget:
+                        # block over instruction limit, its first instruction is executed alone
+                        steps, price, count, last, last_line, refunds, lines = self._exact_block(priced[start], start)
+                state.instruction_price += price
+                state.executed_instructions += count
+                # CALL as last instruction pushes its index as return address
+                state.program_counter = last
+                executed = 0
+                try:
+                    for step in steps:
+                        step(state)
+                        executed += 1
+                except Exception:
+                    # exact state for failed instruction, rest of block is refunded
+                    if count:
+                        state.instruction_price -= refunds[executed]
+                        state.executed_instructions -= count - executed
+                        if executed:
+                            state.program_line = lines[executed - 1]
+                    state.program_counter = start + executed
+                    raise
+                if last_line is not None:
+                    state.program_line = last_line
+
+                if state.program_counter == last:
+                    state.program_counter = last + 1
+        except InterpreterStopException:
+            pass
+        return state
+
+    def _run_transpiled(self, limits=None):
+        program = self._transpile()
+        if program is None:
+            return self._run_standard(limits)
+
+        state, program_length = self._prepare_state()
+        try:
+            program.run(state, self._compile(), limits)
+        except InterpreterStopException:
+            pass
+        return state
+
+    def _run_instrumented(self, limits=None):
+        state, program_length = self._prepare_state()
+        if self._engine != self.ENGINE_STANDARD:
+            # hooks observe each instruction, so without blocks
+            steps = self._compile()
+        else:
+            steps = tuple(instruction.run for instruction in self._instructions)
+
+        pre_hooks = tuple(self._hooks[self.HOOK_PRE_INSTRUCTION])
+        post_hooks = tuple(self._hooks[self.HOOK_POST_INSTRUCTION])
+        call_hooks = tuple(self._hooks[self.HOOK_CALL])
+        return_hooks = tuple(self._hooks[self.HOOK_RETURN])
+        samples = [[interval, interval, callback] for interval, callback in self._hooks[self.HOOK_SAMPLE]]
+        calls = {
+            i: instruction.op0.label for i, instruction in enumerate(self._instructions) if instruction.name == 'CALL'
+        } if call_hooks else {}
+        returns = frozenset(
+            i for i, instruction in enumerate(self._instructions) if instruction.name == 'RETURN'
+        ) if return_hooks else frozenset()
+        next_sample = min(sample[0] for sample in samples) if samples else -1
+        executed = 0
+        budget = limits.check(state) if limits else UNLIMITED
+
+        try:
+            while state.program_counter < program_length and self._active:
+                if state.executed_instructions >= budget:
+                    budget = limits.check(state)
+                program_counter = state.program_counter
+                for hook in pre_hooks:
+                    hook(state, program_counter)
+                try:
+                    steps[program_counter](state)
+                finally:
+                    for hook in post_hooks:
+                        hook(state, program_counter)
+
+                if program_counter in calls:
+                    for hook in call_hooks:
+                        hook(state, program_counter, calls[program_counter])
+                elif program_counter in returns:
+                    for hook in return_hooks:
+                        hook(state, program_counter)
+
+                executed += 1
+                if executed == next_sample:
+                    for sample in samples:
+                        if sample[0] == executed:
+                            sample[0] += sample[1]
+                            sample[2](state, program_counter)
+                    next_sample = min(sample[0] for sample in samples)
+
+                if program_counter == state.program_counter:
+                    # increment only in case of not manipulating with PC
+                    state.program_counter += 1
+        except InterpreterStopException:
+            pass
+        return state
+
     def debug(self):
         state, program_length = self._prepare_state()
         while state.program_counter < program_length and self._active:
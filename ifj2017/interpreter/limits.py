@@ -0,0 +1,38 @@
+# coding=utf-8
+from time import monotonic
+
+from .exceptions import InstructionLimitError, TimeLimitError
+
+UNLIMITED = float('inf')
+
+
+# limits of one run of interpreter checked natively by engines, engine executes instructions only while count
+# of executed instructions stays in budget returned by last check, so instruction limit is exact and clock
+# is read once per budget
+class Limits(object):
+    TIME_CHECK_INTERVAL = 1 << 14  # executed instructions between reads of clock
+
+    def __init__(self, instruction_limit=None, time_limit=None):
+        # type: (int, float) -> None
+        assert instruction_limit is None or instruction_limit > 0, 'Instruction limit is positive int'
+        assert time_limit is None or time_limit > 0, 'Time limit is positive float'
+        self._instruction_limit = instruction_limit
+        self._max_executed = instruction_limit if instruction_limit is not None else UNLIMITED
+        self._time_limit = time_limit
+        self._deadline = monotonic() + time_limit if time_limit is not None else None
+
+    def check(self, state, size=1):
+        # type: (State, int) -> int
+        # raises error of exceeded limit before execution of next instruction, returns budget for at least
+        # next size instructions, which is lower only in case of reaching instruction limit
+        executed = state.executed_instructions
+        if executed >= self._max_executed:
+            raise InstructionLimitError(state, self._instruction_limit)
+        if self._deadline is None:
+            return self._max_executed
+        if monotonic() > self._deadline:
+            raise TimeLimitError(state, self._time_limit)
+        return min(self._max_executed, executed + max(size, self.TIME_CHECK_INTERVAL))
+
+
+__all__ = ['Limits', 'UNLIMITED']
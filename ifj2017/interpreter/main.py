@@ -2,7 +2,10 @@
 from argparse import ArgumentParser
 from sys import stdout, stderr, stdin
 
+from ifj2017.interpreter import bytecode
+from ifj2017.interpreter.exceptions import ExecutionLimitError
 from ifj2017.interpreter.interpreter import Interpreter
+from ifj2017.interpreter.profiler import Profiler
 
 
 def main():
@@ -13,26 +16,61 @@ def main():
         """
     )
 
-    parser.add_argument("file", help="path to file of IFJcode17 to interpret")
+    parser.add_argument("file", help="path to file of IFJcode17 or its bytecode to interpret")
+    parser.add_argument("--engine", help="execution engine of interpreter", choices=Interpreter.ENGINES,
+                        default=Interpreter.ENGINE_COMPILED)
+    parser.add_argument("--profile", action='store_true', help="print price of program per line, opcode and "
+                                                               "function to stderr", default=False)
+    parser.add_argument("--profile-output", help="path to file for profile, JSON for .json extension, "
+                                                 "collapsed stacks for flamegraph tools otherwise", type=str)
+    parser.add_argument("--strict-labels", action='store_true', help="report unknown labels before execution",
+                        default=False)
+    parser.add_argument("--instruction-limit", help="maximal count of executed instructions", type=int)
+    parser.add_argument("--time-limit", help="maximal time of interpretation in seconds", type=float)
+    parser.add_argument("--emit-bytecode", help="path to file for bytecode of program, which is loaded without "
+                                                "parsing, program is not interpreted", type=str)
 
     args = parser.parse_args()
 
+    code = program = None
     try:
-        with open(args.file) as f:
-            code = f.read()
+        if bytecode.is_bytecode(args.file):
+            program = bytecode.load(args.file)
+        else:
+            with open(args.file) as f:
+                code = f.read()
     except Exception as e:
         print("Cannot load code from file {} due {}.".format(args.file, e), file=stderr)
         exit(1)
         return
 
-    Interpreter(
+    interpreter = Interpreter(
         code,
         state_kwargs=dict(
             stdout=stdout,
             stderr=stderr,
             stdin=stdin
-        )
-    ).run()
+        ),
+        engine=args.engine,
+        strict_labels=args.strict_labels,
+        bytecode=program
+    )
+    if args.emit_bytecode:
+        bytecode.dump(interpreter.instructions, args.emit_bytecode)
+        return 0
+
+    profiler = Profiler().attach(interpreter) if args.profile or args.profile_output else None
+    try:
+        interpreter.run(instruction_limit=args.instruction_limit, time_limit=args.time_limit)
+    except ExecutionLimitError as e:
+        print('{}\n{}'.format(e, e.state), file=stderr)
+        # same as timeout from coreutils
+        return 124
+    finally:
+        if profiler and args.profile:
+            print(profiler.table(), file=stderr)
+        if profiler and args.profile_output:
+            profiler.save(args.profile_output)
 
     return 0
 
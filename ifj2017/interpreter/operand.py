@@ -1,15 +1,24 @@
 # coding=utf-8
 import re
 from enum import IntEnum
-from typing import Match
+from operator import attrgetter
 
-from .exceptions import InvalidCodeException
+from .exceptions import InvalidCodeException, InvalidOperandTypeError, UndefinedVariableError, \
+    UndeclaredVariableError, FrameError, VariableAlreadyDefinedError
+from .frame import UNDECLARED
+from .prices import InstructionPrices
 
 _IDENTIFIER_RE_PART = r'[a-z_\-$&%*][\w_\-$&%*]*'
-CONSTANT_RE = re.compile(r'^(?P<type>bool|int|string|float)@(?P<value>.*)$', re.IGNORECASE)
-VARIABLE_RE = re.compile(r'^(?P<frame>[GLT]F)@(?P<name>{})$'.format(_IDENTIFIER_RE_PART), re.IGNORECASE)
-TYPE_RE = re.compile(r'^(?P<type>int|string|bool|float)$', re.IGNORECASE)
-LABEL_RE = re.compile(r'^{}$'.format(_IDENTIFIER_RE_PART), re.IGNORECASE)
+# all kinds of operands in one pass, alternatives are ordered by priority of operand kinds
+OPERAND_RE = re.compile(
+    r'^(?:'
+    r'(?P<constant_type>bool|int|string|float)@(?P<constant_value>.*)'
+    r'|(?P<frame>[GLT]F)@(?P<name>{identifier})'
+    r'|(?P<data_type>int|string|bool|float)'
+    r'|(?P<label>{identifier})'
+    r')$'.format(identifier=_IDENTIFIER_RE_PART),
+    re.IGNORECASE
+)
 
 float_ = float
 
@@ -22,15 +31,34 @@ def float(value):
         return float_.fromhex(value)
 
 
-ESCAPE_RE = re.compile(r'\\([0-9]{3})')
+# magic for decimal \ddd to octal \ooo
+_ESCAPE_SEQUENCES = {'{:03}'.format(code): chr(code) for code in range(1000)}
 
 
 def unquote_escape_sequences(value):
-    def __(m):
-        # magic for decimal \ddd to octal \ooo
-        return chr(int(m.group(1)))
+    if '\\' not in value:
+        return value
+    parts = value.split('\\')
+    unquoted = [parts[0]]
+    for part in parts[1:]:
+        char = _ESCAPE_SEQUENCES.get(part[:3])
+        unquoted.append(char + part[3:] if char else '\\' + part)
+    return ''.join(unquoted)
 
-    return ESCAPE_RE.sub(__, value)
+
+# decoded string constants shared by all operands, cleared when grows over limit
+_STRING_CONSTANTS = {}
+_STRING_CONSTANTS_LIMIT = 1 << 16
+
+
+def _intern_string(value):
+    interned = _STRING_CONSTANTS.get(value)
+    if interned is not None:
+        return interned
+    if len(_STRING_CONSTANTS) >= _STRING_CONSTANTS_LIMIT:
+        _STRING_CONSTANTS.clear()
+    _STRING_CONSTANTS[value] = value
+    return value
 
 
 class TypeOperand(IntEnum):
@@ -40,6 +68,151 @@ class TypeOperand(IntEnum):
     DATA_TYPE = 4
 
 
+_CONSTANT_DECODERS = {
+    'bool': lambda value: Operand.BOOL_LITERAL_MAPPING.get(value.lower()),
+    'int': int,
+    'float': float,
+    'string': lambda value: _intern_string(unquote_escape_sequences(value)),
+}
+
+
+def parse_operand(value):
+    # type: (str) -> tuple
+    # classifies and decodes operand in one pass, returns spec (type, first, second) for Operand
+    match = OPERAND_RE.match(value)
+    if not match:
+        raise InvalidCodeException(InvalidCodeException.INVALID_OPERAND)
+
+    # last group is unique for every alternative of operand kind
+    kind = match.lastgroup
+    if kind == 'constant_value':
+        try:
+            decoded = _CONSTANT_DECODERS.get(match.group('constant_type').lower())(match.group('constant_value'))
+        except ValueError:
+            decoded = None
+        if decoded is None:
+            raise InvalidCodeException(type_=InvalidCodeException.INVALID_OPERAND)
+        return TypeOperand.CONSTANT, decoded, None
+    elif kind == 'name':
+        return TypeOperand.VARIABLE, match.group('frame'), match.group('name')
+    elif kind == 'data_type':
+        return TypeOperand.DATA_TYPE, match.group('data_type').lower(), None
+    # is label
+    return TypeOperand.LABEL, value, None
+
+
+# operand accessors, read(state) returns value of operand, write(state, what) stores operand or plain value
+# and define(state) declares variable, all with exact operand price accounting; built once per operand
+# to avoid any branching on access
+
+def _invalid_read(state):
+    raise InvalidOperandTypeError()
+
+
+def _invalid_write(state, what):
+    raise InvalidOperandTypeError()
+
+
+def _invalid_define(state):
+    raise InvalidOperandTypeError()
+
+
+def _constant_accessors(value):
+    price = InstructionPrices.OPERAND_CONSTANT
+
+    def read(state):
+        state.operand_price += price
+        return value
+
+    return read, _invalid_write, _invalid_define
+
+
+def _local_frame(state):
+    frame_stack = state.frame_stack
+    if not frame_stack:
+        raise FrameError('Access to non existing local frame.')
+    return frame_stack[-1]
+
+
+def _temp_frame(state):
+    frame = state.temp_frame
+    if frame is None:
+        raise FrameError('Non existing frame TF')
+    return frame
+
+
+_FRAME_GETTERS = {
+    'GF': attrgetter('global_frame'),
+    'LF': _local_frame,
+    'TF': _temp_frame,
+}
+
+
+def _variable_accessors(frame_name, name):
+    # access by name, for frames without slot layout
+    price = InstructionPrices.OPERAND_VARIABLE
+    get_frame = _FRAME_GETTERS.get(frame_name.upper())
+
+    def read(state):
+        state.operand_price += price
+        # wanted key error
+        variable_value = get_frame(state)[name]
+        if variable_value is None:
+            raise UndefinedVariableError(name, frame_name)
+        return variable_value
+
+    def write(state, what):
+        frame = get_frame(state)
+        if name not in frame and what is not None:  # declared or declaration
+            raise UndeclaredVariableError(name, frame_name)
+        frame[name] = what.read(state) if isinstance(what, Operand) else what
+        state.operand_price += price
+
+    def define(state):
+        frame = get_frame(state)
+        if name in frame:
+            raise VariableAlreadyDefinedError()
+        frame[name] = None
+        state.operand_price += price
+
+    return read, write, define
+
+
+def _slot_variable_accessors(frame_name, name, slot):
+    # access by slot index, frames are instances of Frame with layout containing the variable
+    price = InstructionPrices.OPERAND_VARIABLE
+    get_frame = _FRAME_GETTERS.get(frame_name.upper())
+
+    def read(state):
+        state.operand_price += price
+        variable_value = get_frame(state).slots[slot]
+        if variable_value is None:
+            raise UndefinedVariableError(name, frame_name)
+        if variable_value is UNDECLARED:
+            # wanted key error
+            raise KeyError(name)
+        return variable_value
+
+    def write(state, what):
+        frame = get_frame(state)
+        slots = frame.slots
+        if slots[slot] is UNDECLARED:  # declared or declaration
+            if what is not None:
+                raise UndeclaredVariableError(name, frame_name)
+            frame.define(name, slot)
+        slots[slot] = what.read(state) if isinstance(what, Operand) else what
+        state.operand_price += price
+
+    def define(state):
+        frame = get_frame(state)
+        if frame.slots[slot] is not UNDECLARED:
+            raise VariableAlreadyDefinedError()
+        frame.define(name, slot)
+        state.operand_price += price
+
+    return read, write, define
+
+
 class Operand(object):
     type = None
     # constant
@@ -51,6 +224,8 @@ class Operand(object):
     data_type = None
     # label
     label = None
+    # index of instruction with label, resolved by interpreter
+    target = None
 
     CONSTANT_MAPPING = {
         'bool': bool,
@@ -63,60 +238,76 @@ class Operand(object):
 
     BOOL_LITERAL_MAPPING = {'true': True, 'false': False}
 
+    # variable slot index in frame layout
+    slot = None
+
+    read = staticmethod(_invalid_read)
+    write = staticmethod(_invalid_write)
+    define = staticmethod(_invalid_define)
+
     def __init__(self, value):
         # type: (str) -> None
-        constant_match = CONSTANT_RE.match(value)
-        if constant_match:
-            self._resolve_constant(constant_match)
-            return
-        variable_match = VARIABLE_RE.match(value)
-        if variable_match:
-            self._resolve_variable(variable_match)
-            return
-        type_match = TYPE_RE.match(value)
-        if type_match:
-            self._resolve_type(type_match)
-            return
-        label_match = LABEL_RE.match(value)
-        if label_match:
-            # is label
-            self.label = value
-            self.type = TypeOperand.LABEL
-            return
+        self._set_spec(*parse_operand(value))
 
-        raise InvalidCodeException(InvalidCodeException.INVALID_OPERAND)
+    @classmethod
+    def from_spec(cls, spec):
+        # type: (tuple) -> Operand
+        # rebuilds operand from spec created by to_spec without any parsing
+        operand = cls.__new__(cls)
+        operand._set_spec(*spec)
+        return operand
 
-    def _resolve_constant(self, constant_match: Match[str]) -> None:
-        type_, value = constant_match.groups()  # type: str, str
-        type_ = type_.lower().strip()
-        try:
-            self.value = self.CONSTANT_MAPPING.get(type_)(value)
-            if type_ == self.CONSTANT_MAPPING_REVERSE.get(bool):
-                self.value = self.BOOL_LITERAL_MAPPING.get(value.lower())
-            elif type_ == self.CONSTANT_MAPPING_REVERSE.get(str):
-                self.value = unquote_escape_sequences(value=self.value)
-        except ValueError:
-            pass
-        if self.value is None:
-            raise InvalidCodeException(type_=InvalidCodeException.INVALID_OPERAND)
+    def to_spec(self):
+        # type: () -> tuple
+        # plain tuple (type, first, second) with resolved operand, serializable by marshal
+        if self.type == TypeOperand.CONSTANT:
+            return int(self.type), self.value, None
+        elif self.type == TypeOperand.VARIABLE:
+            return int(self.type), self.frame, self.name
+        elif self.type == TypeOperand.DATA_TYPE:
+            return int(self.type), self.data_type, None
+        return int(self.type), self.label, None
+
+    def _set_spec(self, type_, first, second):
+        if type_ == TypeOperand.CONSTANT:
+            self._set_constant(first)
+        elif type_ == TypeOperand.VARIABLE:
+            self._set_variable(first, second)
+        elif type_ == TypeOperand.DATA_TYPE:
+            self._set_data_type(first)
+        else:
+            self._set_label(first)
+
+    def _set_constant(self, value):
+        self.value = value
         self.type = TypeOperand.CONSTANT
+        self.read, self.write, self.define = _constant_accessors(value)
 
-    def _resolve_variable(self, variable_match: Match[str]) -> None:
-        # type: (Match) -> None
-        frame, name = variable_match.groups()
-        if not (frame and name):
-            raise InvalidCodeException(type_=InvalidCodeException.INVALID_OPERAND)
+    def _set_variable(self, frame, name):
         self.frame = frame
         self.name = name
         self.type = TypeOperand.VARIABLE
+        self.read, self.write, self.define = _variable_accessors(frame, name)
 
-    def _resolve_type(self, type_match: Match[str]) -> None:
-        # type: (Match[str]) -> None
-        self.data_type = type_match.group(1).lower()
-        if self.data_type not in self.CONSTANT_MAPPING:
-            raise InvalidCodeException(type_=InvalidCodeException.INVALID_OPERAND)
+    def _set_data_type(self, data_type):
+        self.data_type = data_type
         self.type = TypeOperand.DATA_TYPE
 
+    def _set_label(self, label):
+        self.label = label
+        self.type = TypeOperand.LABEL
+
+    def bind_slot(self, slot):
+        # type: (int) -> None
+        assert self.type == TypeOperand.VARIABLE
+        self.slot = slot
+        self.read, self.write, self.define = _slot_variable_accessors(self.frame, self.name, slot)
+
+    def bind_target(self, target):
+        # type: (int) -> None
+        assert self.type == TypeOperand.LABEL
+        self.target = target
+
     def __str__(self):
         return 'Operand({})'.format(
             self.value or self.name or self.label
@@ -0,0 +1,228 @@
+# coding=utf-8
+import json
+import os.path as path
+from collections import defaultdict
+
+
+# node of trie of call stacks, one per distinct stack of labels entered by CALL
+class _StackNode(object):
+    __slots__ = ('label', 'parent', 'children', 'counters')
+
+    def __init__(self, label, parent=None):
+        # type: (str, _StackNode) -> None
+        self.label = label
+        self.parent = parent
+        self.children = {}  # label -> node
+        self.counters = None  # [executed, price], if any instruction was executed in this stack
+
+
+# aggregation of executions and price per instruction of program, reports are built per source line, per opcode and
+# per function, which is label entered by CALL, instructions of function are attributed to whole stack of calls
+class Profiler(object):
+    MAIN = '(main)'
+    TABLE_LIMIT = 20
+
+    def __init__(self):
+        self._instructions = ()
+        self._executed = []
+        self._instruction_prices = []
+        self._operand_prices = []
+        self._before = (0, 0, 0)  # counters of state before current instruction
+        self._root = self._node = _StackNode(self.MAIN)  # current stack of calls is path from root to node
+        self._calls = defaultdict(int)
+
+    def attach(self, interpreter):
+        # type: (Interpreter) -> Profiler
+        self._instructions = interpreter.instructions
+        count = len(self._instructions)
+        self._executed = [0] * count
+        self._instruction_prices = [0] * count
+        self._operand_prices = [0] * count
+        self._root = self._node = _StackNode(self.MAIN)
+        self._calls = defaultdict(int)
+
+        interpreter.add_hook(interpreter.HOOK_PRE_INSTRUCTION, self._pre_instruction)
+        interpreter.add_hook(interpreter.HOOK_POST_INSTRUCTION, self._post_instruction)
+        interpreter.add_hook(interpreter.HOOK_CALL, self._call)
+        interpreter.add_hook(interpreter.HOOK_RETURN, self._return)
+        return self
+
+    def _pre_instruction(self, state, program_counter):
+        # type: (State, int) -> None
+        self._before = state.executed_instructions, state.instruction_price, state.operand_price
+
+    def _post_instruction(self, state, program_counter):
+        # type: (State, int) -> None
+        # also failed instruction, its operands could be already priced
+        executed, instruction_price, operand_price = self._before
+        executed = state.executed_instructions - executed
+        instruction_price = state.instruction_price - instruction_price
+        operand_price = state.operand_price - operand_price
+
+        self._executed[program_counter] += executed
+        self._instruction_prices[program_counter] += instruction_price
+        self._operand_prices[program_counter] += operand_price
+
+        counters = self._node.counters
+        if counters is None:
+            counters = self._node.counters = [0, 0]
+        counters[0] += executed
+        counters[1] += instruction_price + operand_price
+
+    def _call(self, state, program_counter, label):
+        # type: (State, int, str) -> None
+        node = self._node.children.get(label)
+        if node is None:
+            node = self._node.children[label] = _StackNode(label, self._node)
+        self._node = node
+        self._calls[label] += 1
+
+    def _return(self, state, program_counter):
+        # type: (State, int) -> None
+        if self._node.parent is not None:
+            self._node = self._node.parent
+
+    # reports, rows are sorted by price descending
+
+    def by_line(self):
+        # type: () -> list
+        # (line, opcode, executed, instruction price, operand price)
+        return self._sorted(
+            (
+                instruction.line_index,
+                instruction.name,
+                self._executed[i],
+                self._instruction_prices[i],
+                self._operand_prices[i],
+            )
+            for i, instruction in enumerate(self._instructions)
+            if self._executed[i] or self._operand_prices[i]
+        )
+
+    def by_opcode(self):
+        # type: () -> list
+        # (opcode, executed, instruction price, operand price)
+        opcodes = defaultdict(lambda: [0, 0, 0])
+        for _, name, executed, instruction_price, operand_price in self.by_line():
+            opcode = opcodes[name]
+            opcode[0] += executed
+            opcode[1] += instruction_price
+            opcode[2] += operand_price
+        return self._sorted((name,) + tuple(values) for name, values in opcodes.items())
+
+    def by_function(self):
+        # type: () -> list
+        # (label, calls, executed, self price, inclusive price)
+        nodes = self._nodes()
+        # price of stack including its callees, only for stacks with executed instructions
+        inclusive = {}
+        for node in reversed(nodes):
+            prices = [inclusive[child] for child in node.children.values() if child in inclusive]
+            if node.counters is not None:
+                prices.append(node.counters[1])
+            if prices:
+                inclusive[node] = sum(prices)
+
+        functions = defaultdict(lambda: [0, 0, 0])
+        active = defaultdict(int)  # count of label on walked stack, recursive calls are included only once
+        pending = [(self._root, True)]
+        while pending:
+            node, entering = pending.pop()
+            if not entering:
+                active[node.label] -= 1
+                continue
+            if node.counters is not None:
+                functions[node.label][0] += node.counters[0]
+                functions[node.label][1] += node.counters[1]
+            if not active[node.label] and node in inclusive:
+                functions[node.label][2] += inclusive[node]
+            active[node.label] += 1
+            pending.append((node, False))
+            pending.extend((child, True) for child in node.children.values())
+        return sorted(
+            (
+                (label, self._calls.get(label, 0), executed, self_price, inclusive_price)
+                for label, (executed, self_price, inclusive_price) in functions.items()
+            ),
+            key=lambda row: (-row[4], -row[3], row[0])
+        )
+
+    def collapsed(self):
+        # type: () -> list
+        # lines of collapsed stacks with price for flamegraph tools
+        return sorted(
+            '{} {}'.format(';'.join(stack), price)
+            for stack, (_, price) in self._stacks()
+            if price
+        )
+
+    def to_json(self):
+        # type: () -> dict
+        return {
+            'lines': [dict(zip(('line', 'opcode', 'executed', 'instruction_price', 'operand_price'), row))
+                      for row in self.by_line()],
+            'opcodes': [dict(zip(('opcode', 'executed', 'instruction_price', 'operand_price'), row))
+                        for row in self.by_opcode()],
+            'functions': [dict(zip(('label', 'calls', 'executed', 'self_price', 'inclusive_price'), row))
+                          for row in self.by_function()],
+            'stacks': [dict(stack=list(stack), executed=executed, price=price)
+                       for stack, (executed, price) in sorted(self._stacks())],
+        }
+
+    def table(self, limit=TABLE_LIMIT):
+        # type: (int) -> str
+        lines = ['{:>6} {:<14} {:>10} {:>10} {:>10} {:>10}'.format(
+            'LINE', 'OPCODE', 'EXECUTED', 'PRICE', 'INSTR', 'OPERAND'
+        )]
+        lines.extend(
+            '{:>6} {:<14} {:>10} {:>10} {:>10} {:>10}'.format(
+                line, name, executed, instruction_price + operand_price, instruction_price, operand_price
+            ) for line, name, executed, instruction_price, operand_price in self.by_line()[:limit]
+        )
+        lines.append('')
+        lines.append('{:<21} {:>10} {:>10} {:>10} {:>10}'.format('OPCODE', 'EXECUTED', 'PRICE', 'INSTR', 'OPERAND'))
+        lines.extend(
+            '{:<21} {:>10} {:>10} {:>10} {:>10}'.format(
+                name, executed, instruction_price + operand_price, instruction_price, operand_price
+            ) for name, executed, instruction_price, operand_price in self.by_opcode()[:limit]
+        )
+        lines.append('')
+        lines.append('{:<21} {:>10} {:>10} {:>10} {:>10}'.format('FUNCTION', 'CALLS', 'EXECUTED', 'SELF', 'TOTAL'))
+        lines.extend(
+            '{:<21} {:>10} {:>10} {:>10} {:>10}'.format(*row) for row in self.by_function()[:limit]
+        )
+        return '\n'.join(lines)
+
+    def save(self, file):
+        # type: (str) -> None
+        # JSON for .json files, collapsed stacks otherwise
+        with open(file, 'w') as f:
+            {
+                '.json': lambda: json.dump(self.to_json(), f, indent=2),
+            }.get(path.splitext(file)[1].lower(), lambda: f.write(''.join(
+                '{}\n'.format(line) for line in self.collapsed()
+            )))()
+
+    def _nodes(self):
+        # type: () -> list
+        # nodes of trie of call stacks, each one before its callees, without recursion limited by depth of calls
+        nodes = [self._root]
+        for node in nodes:
+            nodes.extend(node.children.values())
+        return nodes
+
+    def _stacks(self):
+        # type: () -> list
+        # (stack of labels, [executed, price]) of stacks with executed instructions, built only for reports
+        stacks = {None: ()}
+        for node in self._nodes():
+            stacks[node] = stacks[node.parent] + (node.label,)
+        return [(stacks[node], node.counters) for node in self._nodes() if node.counters is not None]
+
+    @staticmethod
+    def _sorted(rows):
+        # price descending, key ascending
+        return sorted(rows, key=lambda row: (-(row[-2] + row[-1]), row[0]))
+
+
+__all__ = ['Profiler']
@@ -2,30 +2,44 @@
 import logging
 import re
 from io import StringIO
+from operator import attrgetter
 from typing import Optional, Union
 
-from ifj2017.interpreter.exceptions import UnknownDataTypeError, StringError, VariableAlreadyDefinedError
-from .exceptions import EmptyDataStackError, UndefinedVariableError, UndeclaredVariableError, \
-    FrameError, UnknownLabelError, InvalidReturnError, InvalidOperandTypeError
-from .operand import Operand, TypeOperand
+from ifj2017.interpreter.exceptions import UnknownDataTypeError, StringError
+from .exceptions import EmptyDataStackError, FrameError, UnknownLabelError, InvalidReturnError
+from .frame import Frame
+from .operand import Operand
 from .prices import InstructionPrices
 
 
+def render_value(value):
+    # text of value printed by WRITE
+    if isinstance(value, bool):
+        return str(value).lower()
+    elif isinstance(value, int):
+        return '{: d}'.format(value)
+    elif isinstance(value, float):
+        return '{: g}'.format(value)
+    return str(value)
+
+
 class State(object):
     program_counter = 0
     executed_instructions = 0
     program_line = 0
 
-    def __init__(self, stdout=None, stderr=None, stdin=None):
+    def __init__(self, stdout=None, stderr=None, stdin=None, global_layout=None, local_layout=None):
         self.stdout = stdout or StringIO()
         self.stderr = stderr or StringIO()
         self.stdin = stdin or StringIO()
+        # slot layouts of frames, frames without layout are plain dicts
+        self._local_layout = local_layout
         self.temp_frame = None
         self.frame_stack = []  # top at end of list
-        self.global_frame = {}
+        self.global_frame = Frame(global_layout) if global_layout is not None else {}
         self.call_stack = []  # top at end of list
         self.data_stack = []  # top at end of list
-        self.labels = {}
+        self.labels = {}  # shared table of interpreter, label operands are already resolved to targets
 
         self.instruction_price = 0
         self.operand_price = 0
@@ -38,15 +52,17 @@ class State(object):
             raise FrameError('Access to non existing local frame.')
         return self.frame_stack[-1]
 
+    _FRAMES = {
+        'TF': attrgetter('temp_frame'),
+        'LF': attrgetter('local_frame'),
+        'GF': attrgetter('global_frame'),
+    }
+
     def frame(self, frame: str):
-        return {
-            'TF': lambda: self.temp_frame,
-            'LF': lambda: self.local_frame,
-            'GF': lambda: self.global_frame,
-        }.get(frame.upper())()
+        return self._FRAMES.get(frame.upper())(self)
 
     def create_frame(self):
-        self.temp_frame = {}
+        self.temp_frame = Frame(self._local_layout) if self._local_layout is not None else {}
 
     def push_frame(self):
         if self.temp_frame is None:
@@ -58,8 +74,7 @@ class State(object):
     def pop_frame(self):
         if not self.frame_stack:
             raise FrameError('Non-existing frame to pop.')
-        self.temp_frame = self.frame_stack[-1]
-        self.frame_stack = self.frame_stack[:-1]
+        self.temp_frame = self.frame_stack.pop()
 
     def get_value(self, value: Optional[Operand]) -> Union[None, int, str, float]:
         if value is None:
@@ -68,66 +83,44 @@ class State(object):
 
         if not isinstance(value, Operand):
             return value
-        if value.type == TypeOperand.CONSTANT:
-            self.operand_price += InstructionPrices.OPERAND_CONSTANT
-            return value.value
-        elif value.type == TypeOperand.VARIABLE:
-            # wanted key error
-            self.operand_price += InstructionPrices.OPERAND_VARIABLE
-            variable_value = self.frame(value.frame)[value.name]
-            if variable_value is None:
-                raise UndefinedVariableError(value.name, value.frame)
-            return variable_value
-        raise InvalidOperandTypeError()
+        return value.read(self)
 
     def set_value(self, to, what):
         # type: (Operand, Operand|object) -> None
-        if to.type != TypeOperand.VARIABLE:
-            raise InvalidOperandTypeError()
-
-        frame = self.frame(to.frame)
-        if frame is None:
-            raise FrameError('Non existing frame {}'.format(to.frame))
-        if to.name not in frame and what is not None:  # declared or declaration
-            raise UndeclaredVariableError(to.name, to.frame)
-        frame[to.name] = self.get_value(what)
-
-        # explicit variable access, only declaration
-        self.operand_price += InstructionPrices.OPERAND_VARIABLE
+        to.write(self, what)
 
     def define_variable(self, variable):
         # type: (Operand) -> None
-        frame = self.frame(variable.frame)
-        if variable.name in frame:
-            raise VariableAlreadyDefinedError()
-
-        frame[variable.name] = None
-        self.operand_price += InstructionPrices.OPERAND_VARIABLE
+        variable.define(self)
+
+    def _target(self, op):
+        # type: (Operand) -> int
+        target = op.target
+        if target is None:
+            # unknown or not resolved label
+            target = self.labels.get(op.label)
+            if target is None:
+                raise UnknownLabelError(op.label)
+        return target
 
     def call(self, op):
         # type: (Operand, Operand) -> None
-        if op.label not in self.labels:
-            raise UnknownLabelError(op.label)
-
+        target = self._target(op)
         self.call_stack.append(self.program_counter)
-        self.program_counter = self.labels.get(op.label)
+        self.program_counter = target
 
     def return_(self):
         if not self.call_stack:
             raise InvalidReturnError()
-        self.program_counter = self.call_stack[-1] + 1
-        self.call_stack = self.call_stack[:-1]
+        self.program_counter = self.call_stack.pop() + 1
 
     def jump(self, op):
         # type: (Operand) -> None
-        if op.label not in self.labels:
-            raise UnknownLabelError(op.label)
-
-        self.program_counter = self.labels.get(op.label)
+        self.program_counter = self._target(op)
 
     def push_stack(self, op):
         value = self.get_value(op)
-        logging.debug("Push {} to stack.".format(value))
+        logging.debug("Push %s to stack.", value)
         self.data_stack.append(value)
         self.operand_price += InstructionPrices.OPERAND_STACK
 
@@ -137,37 +130,38 @@ class State(object):
             raise EmptyDataStackError()
 
         value = self.data_stack[-1]
-        logging.debug("Pop {} from stack.".format(value))
+        logging.debug("Pop %s from stack.", value)
         if op:
             # for operand is set, without is only returned
-            self.set_value(op, value)
+            op.write(self, value)
 
         self.operand_price += InstructionPrices.OPERAND_STACK
-        self.data_stack = self.data_stack[:-1]
+        self.data_stack.pop()
         return value
 
     def jump_if(self, op0, op1, op2, positive=True):
+        # operands could be also values popped from data stack
         equal = self.get_value(op1) == self.get_value(op2)
         if positive == equal:
             self.jump(op0)
 
     def set_char(self, where, index, from_):
-        changed = self.get_value(where)
-        changed[self.get_value(index)] = self.get_value(from_)[0]
-        self.set_value(where, changed)
+        changed = where.read(self)
+        changed[index.read(self)] = from_.read(self)[0]
+        where.write(self, changed)
 
     def get_char(self, target, string, index):
-        source = self.get_value(string)
+        source = string.read(self)
         try:
-            self.set_value(
-                target,
-                source[self.get_value(index)]
+            target.write(
+                self,
+                source[index.read(self)]
             )
         except IndexError:
-            raise StringError(source, self.get_value(index))
+            raise StringError(source, index.read(self))
 
     def str_len(self, target, string):
-        return self.set_value(target, len(self.get_value(string)))
+        return target.write(self, len(string.read(self)))
 
     def read(self, to, type_):
         # type: (Operand, Operand) -> None
@@ -215,16 +209,7 @@ class State(object):
     ESCAPE_RE = re.compile(r'\\([0-9]{3})')
 
     def write(self, op):
-        value = self.get_value(op)
-        rendered = str(value)
-        if isinstance(value, bool):
-            rendered = str(value).lower()
-        elif isinstance(value, int):
-            rendered = '{: d}'.format(value)
-        elif isinstance(value, float):
-            rendered = '{: g}'.format(value)
-
-        self.stdout.write(rendered)
+        self.stdout.write(render_value(op.read(self)))
 
     def string_to_int_stack(self):
         index = self.pop_stack()
@@ -0,0 +1,476 @@
+# coding=utf-8
+import logging
+import warnings
+
+from .blocks import TERMINATORS, split_blocks, is_exact
+from .frame import Frame, UNDECLARED
+from .instruction import even_round, odd_round
+from .limits import UNLIMITED
+from .operand import TypeOperand
+from .prices import InstructionPrices
+from .state import render_value
+
+FILENAME = '<IFJcode17>'
+
+
+class _Deoptimized(Exception):
+    # raised by generated code before any change of state, failed instruction is executed again by exact step
+    pass
+
+
+# instructions writing value of expression over read operands to variable in first operand
+_EXPRESSIONS = {
+    'MOVE': '{}',
+    'ADD': '{} + {}',
+    'SUB': '{} - {}',
+    'MUL': '{} * {}',
+    'DIV': '{} / {}',
+    'LT': '{} < {}',
+    'GT': '{} > {}',
+    'EQ': '{} == {}',
+    'AND': '{} & {}',
+    'OR': '{} | {}',
+    'NOT': 'not {}',
+    'CONCAT': "''.join(({}, {}))",
+    'STRLEN': 'len({})',
+    'GETCHAR': '{}[{}]',
+    'STRI2INT': 'ord({}[{}])',
+    'INT2FLOAT': 'float({})',
+    'FLOAT2INT': 'int({})',
+    'FLOAT2R2EINT': 'E({})',
+    'FLOAT2R2OINT': 'O({})',
+    'INT2CHAR': 'chr({})',
+    'TYPE': 'type({}).__name__',
+}
+
+# stack variants replace popped operands on top of data stack by result
+_STACK_EXPRESSIONS = {
+    name: _EXPRESSIONS.get(name[:-1]) for name in (
+        'ADDS', 'SUBS', 'MULS', 'DIVS', 'LTS', 'GTS', 'EQS', 'ANDS', 'ORS', 'NOTS', 'STRI2INTS',
+        'INT2FLOATS', 'FLOAT2INTS', 'FLOAT2R2EINTS', 'FLOAT2R2OINTS', 'INT2CHARS',
+    )
+}
+
+# count of reads of each operand, TYPE reads its operand twice
+_READS = {'TYPE': 2}
+
+# instructions without operands
+_STATEMENTS = {
+    'LABEL': (),
+    'CLEARS': ('stack.clear()',),
+    'CREATEFRAME': ('state.temp_frame = F(LL)',),
+    'PUSHFRAME': (
+        'if state.temp_frame is None: raise D', 'fs.append(state.temp_frame.copy())', 'state.temp_frame = None',
+    ),
+    'POPFRAME': ('if not fs: raise D', 'state.temp_frame = fs.pop()'),
+}
+
+_FRAMES = {
+    'LF': 'fs[-1]',
+    'TF': 'state.temp_frame',
+}
+
+
+def _is_variable(operand):
+    return operand is not None and operand.type == TypeOperand.VARIABLE and operand.slot is not None
+
+
+def _is_value(operand):
+    return _is_variable(operand) or (operand is not None and operand.type == TypeOperand.CONSTANT)
+
+
+def _is_target(operand):
+    return operand is not None and operand.type == TypeOperand.LABEL and operand.target is not None
+
+
+def _price(operand):
+    if operand.type == TypeOperand.CONSTANT:
+        return InstructionPrices.OPERAND_CONSTANT
+    return InstructionPrices.OPERAND_VARIABLE
+
+
+# generates source of one function for whole program, each basic block is piece of code selected by program
+# counter, GF variables are its locals, LF and TF variables stay in frames, which are moved around by CALL;
+# every emitted line changes state only after all its checks passed, so failed instruction could be executed
+# again by its exact step
+class _Emitter(object):
+    def __init__(self, instructions, global_layout, local_layout):
+        # type: (list, dict, dict) -> None
+        self._instructions = instructions
+        self._globals = ', '.join('g{}'.format(slot) for slot in range(len(global_layout)))
+        self.namespace = dict(
+            U=UNDECLARED, D=_Deoptimized, F=Frame, LL=local_layout, R=render_value, E=even_round, O=odd_round
+        )
+        # line of source -> (index of instruction, True for failed exact step)
+        self.failures = {}
+        # index of instruction -> (instruction price, operand price, count of instructions, program line or None),
+        # charged prices to refund in case of failure of instruction
+        self.refunds = {}
+        self._lines = []  # (indent, code, index of instruction, exact step)
+        self._index = None
+        self._temps = 0
+        self._declared = set()
+        self._defined = set()
+
+    def source(self):
+        # type: () -> str
+        self._emit('def program(state, pc, budget):', 0)
+        for code in (
+                'stack = state.data_stack', 'cs = state.call_stack', 'fs = state.frame_stack',
+                'gf = state.global_frame', 'gfs = gf.slots', 'w = state.stdout.write', 'pl = state.program_line',
+        ):
+            self._emit(code, 1)
+        if self._globals:
+            self._emit('{}, = gfs'.format(self._globals), 1)
+        self._emit('try:', 1)
+        self._emit('while True:', 2)
+        self._tree(tuple(split_blocks(self._instructions)), 3)
+        self._emit('finally:', 1)
+        if self._globals:
+            self._emit('gfs[:] = [{}]'.format(self._globals), 2)
+        self._emit('state.program_line = pl', 2)
+        self._emit('state.program_counter = pc', 2)
+
+        for line_number, (_, _, index, exact) in enumerate(self._lines, start=1):
+            if index is not None:
+                self.failures[line_number] = index, exact
+        return '\n'.join('    ' * indent + code for indent, code, _, _ in self._lines)
+
+    def _emit(self, code, indent=0, exact=False):
+        # type: (str, int, bool) -> None
+        self._lines.append((indent, code, self._index, exact))
+
+    def _temp(self, prefix='t'):
+        self._temps += 1
+        return '{}{}'.format(prefix, self._temps)
+
+    def _tree(self, blocks, indent):
+        # type: (tuple, int) -> None
+        # binary search of block by program counter, program ends on counter out of blocks
+        if len(blocks) > 1:
+            middle = len(blocks) // 2
+            self._emit('if pc < {}:'.format(blocks[middle][0]), indent)
+            self._tree(blocks[:middle], indent + 1)
+            self._tree(blocks[middle:], indent)
+            return
+        start, end = blocks[0]
+        self._emit('if pc == {}:'.format(start), indent)
+        self._block(start, end, indent + 1)
+        self._emit('break', indent)
+
+    def _block(self, start, end, indent):
+        # type: (int, int, int) -> None
+        instructions = self._instructions[start:end]
+        exact = is_exact(self._instructions, start, end)
+        self._declared.clear()
+        self._defined.clear()
+
+        # body is emitted without indentation, which depends on found loop
+        lines, self._lines = self._lines, []
+        operand_prices = []
+        transfer = None
+        for index, instruction in enumerate(instructions, start=start):
+            self._index = index
+            self._temps = 0
+            if exact:
+                price = None
+            elif instruction.name in TERMINATORS:
+                # only last one in block
+                price, transfer = self._terminator(index, instruction) or (None, None)
+            else:
+                price = self._instruction(instruction)
+            if price is None:
+                price = 0
+                self._generic(index, instruction)
+            operand_prices.append(price)
+        body, self._lines = self._lines, lines
+
+        # block jumping to itself is loop without dispatch
+        target, condition, statement = transfer or (end, None, None)
+        loop = target == start and statement is None
+        base = indent + 1 if loop else indent
+        instruction_prices = tuple(InstructionPrices.INSTRUCTIONS.get(instruction.name) for instruction in instructions)
+        charges = tuple(
+            'state.{} += {}'.format(counter, value) for counter, value in (
+                ('instruction_price', sum(instruction_prices)),
+                ('operand_price', sum(operand_prices)),
+                ('executed_instructions', len(instructions)),
+            ) if value
+        )
+
+        self._index = start
+        if loop:
+            self._emit('while True:', indent)
+        # block is entered only in budget of executed instructions, also on each iteration of loop
+        self._emit('if state.executed_instructions + {} > budget: return'.format(len(instructions)), base)
+        if not exact:
+            for charge in charges:
+                self._emit(charge, base)
+            for i, index in enumerate(range(start, end)):
+                self.refunds[index] = (
+                    sum(instruction_prices[i:]),
+                    sum(operand_prices[i:]),
+                    end - index,
+                    instructions[i - 1].line_index if i else None,
+                )
+        self._lines.extend((base + line_indent, code, index, exact_) for line_indent, code, index, exact_ in body)
+        self._index = end - 1
+        if exact:
+            # instruction prints state, so it is charged after execution
+            for charge in charges:
+                self._emit(charge, base)
+            self.refunds[start] = 0, 0, 0, None
+        self._emit('pl = {}'.format(instructions[-1].line_index), base)
+        if loop and condition:
+            self._emit('if {}:'.format(condition), base)
+            self._emit('continue', base + 1)
+            self._emit('pc = {}'.format(end), base)
+            self._emit('break', base)
+        elif loop:
+            self._emit('continue', base)
+        else:
+            if statement:
+                self._emit(statement, base)
+            if condition:
+                self._emit('pc = {} if {} else {}'.format(target, condition, end), base)
+            else:
+                self._emit('pc = {}'.format(target), base)
+        self._emit('continue', indent)
+        self._index = None
+
+    def _read(self, operand):
+        # type: (Operand) -> str
+        # expression of value of operand, its checks are emitted
+        if operand.type == TypeOperand.CONSTANT:
+            value = operand.value
+            if isinstance(value, float):
+                # without literal for inf and nan
+                name = 'k{}'.format(len(self.namespace))
+                self.namespace[name] = value
+                return name
+            return '({!r})'.format(value)
+        frame = operand.frame.upper()
+        if frame == 'GF':
+            variable = 'g{}'.format(operand.slot)
+            if variable not in self._defined:
+                self._emit('if {0} is None or {0} is U: raise D'.format(variable))
+                self._declared.add(variable)
+                self._defined.add(variable)
+            return variable
+        value = self._temp()
+        self._emit('{} = {}.slots[{}]'.format(value, _FRAMES.get(frame), operand.slot))
+        self._emit('if {0} is None or {0} is U: raise D'.format(value))
+        return value
+
+    def _write(self, operand):
+        # type: (Operand) -> str
+        # format of assignment to variable of operand, its checks are emitted
+        frame = operand.frame.upper()
+        if frame == 'GF':
+            variable = 'g{}'.format(operand.slot)
+            if variable not in self._declared:
+                self._emit('if {} is U: raise D'.format(variable))
+            # assignment follows immediately
+            self._declared.add(variable)
+            self._defined.add(variable)
+            return '{} = {{}}'.format(variable)
+        slots = self._temp('s')
+        self._emit('{} = {}.slots'.format(slots, _FRAMES.get(frame)))
+        self._emit('if {}[{}] is U: raise D'.format(slots, operand.slot))
+        return '{}[{}] = {{}}'.format(slots, operand.slot)
+
+    def _instruction(self, instruction):
+        # type: (Instruction) -> int
+        # emits instruction, returns its operand price or None for instruction executed by exact step
+        name = instruction.name
+        operands = tuple(instruction.operands)
+        if name in _EXPRESSIONS:
+            format_ = _EXPRESSIONS.get(name)
+            values = operands[1:]
+            if not (_is_variable(operands[0]) and len(values) == format_.count('{}') and all(map(_is_value, values))):
+                return None
+            reads = tuple(self._read(value) for value in values)
+            self._emit(self._write(operands[0]).format(format_.format(*reads)))
+            return sum(map(_price, values)) * _READS.get(name, 1) + InstructionPrices.OPERAND_VARIABLE
+        if name in _STACK_EXPRESSIONS:
+            format_ = _STACK_EXPRESSIONS.get(name)
+            if format_.count('{}') == 2:
+                self._emit('stack[-2:] = ({},)'.format(format_.format('stack[-2]', 'stack[-1]')))
+                return 3 * InstructionPrices.OPERAND_STACK
+            self._emit('stack[-1] = {}'.format(format_.format('stack[-1]')))
+            return 2 * InstructionPrices.OPERAND_STACK
+        if name == 'PUSHS' and _is_value(operands[0]):
+            self._emit('stack.append({})'.format(self._read(operands[0])))
+            return _price(operands[0]) + InstructionPrices.OPERAND_STACK
+        if name == 'POPS' and _is_variable(operands[0]):
+            self._emit('if not stack: raise D')
+            self._emit(self._write(operands[0]).format('stack.pop()'))
+            return InstructionPrices.OPERAND_VARIABLE + InstructionPrices.OPERAND_STACK
+        if name == 'WRITE' and _is_value(operands[0]):
+            if operands[0].type == TypeOperand.CONSTANT:
+                self._emit('w({!r})'.format(render_value(operands[0].value)))
+            else:
+                self._emit('w(R({}))'.format(self._read(operands[0])))
+            return _price(operands[0])
+        if name == 'DEFVAR' and _is_variable(operands[0]):
+            self._define(operands[0])
+            return InstructionPrices.OPERAND_VARIABLE
+        statements = _STATEMENTS.get(name)
+        if statements is None:
+            return None
+        for code in statements:
+            self._emit(code)
+        return 0
+
+    def _define(self, operand):
+        # type: (Operand) -> None
+        frame = operand.frame.upper()
+        if frame == 'GF':
+            variable = 'g{}'.format(operand.slot)
+            self._emit('if {} is not U: raise D'.format(variable))
+            self._emit('gf.define({!r}, {})'.format(operand.name, operand.slot))
+            self._emit('{} = None'.format(variable))
+            self._declared.add(variable)
+            self._defined.discard(variable)
+            return
+        frame_ = self._temp('f')
+        self._emit('{} = {}'.format(frame_, _FRAMES.get(frame)))
+        self._emit('if {}.slots[{}] is not U: raise D'.format(frame_, operand.slot))
+        self._emit('{}.define({!r}, {})'.format(frame_, operand.name, operand.slot))
+
+    def _terminator(self, index, instruction):
+        # type: (int, Instruction) -> tuple
+        # emits checks of instruction changing program counter, returns its operand price and transfer
+        # (target, condition or None, statement before or None), None for instruction executed by exact step
+        name = instruction.name
+        operands = tuple(instruction.operands)
+        if name == 'RETURN':
+            self._emit('if not cs: raise D')
+            return 0, ('cs.pop() + 1', None, None)
+        if not _is_target(operands[0]):
+            # unknown label is reported by exact step
+            return None
+        target = operands[0].target
+        if name == 'CALL':
+            return 0, (target, None, 'cs.append({})'.format(index))
+        if name == 'JUMP':
+            return 0, (target, None, None)
+        if name in ('JUMPIFEQS', 'JUMPIFNEQS'):
+            self._emit('if len(stack) < 2: raise D')
+            condition = 'stack.pop() {} stack.pop()'.format('==' if name == 'JUMPIFEQS' else '!=')
+            return 2 * InstructionPrices.OPERAND_STACK, (target, condition, None)
+        values = operands[1:]
+        if len(values) != 2 or not all(map(_is_value, values)):
+            return None
+        first, second = self._read(values[0]), self._read(values[1])
+        condition = '{} {} {}'.format(first, '==' if name == 'JUMPIFEQ' else '!=', second)
+        return sum(map(_price, values)), (target, condition, None)
+
+    def _generic(self, index, instruction):
+        # type: (int, Instruction) -> None
+        # instruction is executed by its exact step, which charges operand price by itself, GF variables
+        # are synchronized with global frame
+        step = 'u{}'.format(index)
+        self.namespace[step] = instruction.compile(priced=False)
+        slots = tuple(sorted({
+            operand.slot for operand in instruction.operands
+            if _is_variable(operand) and operand.frame.upper() == 'GF'
+        }))
+        if instruction.name == 'BREAK':
+            # prints whole state
+            if self._globals:
+                self._emit('gfs[:] = [{}]'.format(self._globals))
+            self._emit('state.program_counter = {}'.format(index))
+        for slot in slots:
+            self._emit('gfs[{0}] = g{0}'.format(slot))
+        self._emit('{}(state)'.format(step), exact=True)
+        for slot in slots:
+            self._emit('g{0} = gfs[{0}]'.format(slot))
+            self._declared.discard('g{}'.format(slot))
+            self._defined.discard('g{}'.format(slot))
+
+
+# program translated to Python function, its exceptions are caught and state of failed instruction
+# is restored, so instruction is executed again by exact step, which fails in the same way as other engines
+class TranspiledProgram(object):
+    def __init__(self, function, failures, refunds, sizes):
+        # type: (callable, dict, dict, dict) -> None
+        self._function = function
+        self._code = function.__code__
+        self._failures = failures
+        self._refunds = refunds
+        self._sizes = sizes  # start of basic block -> count of its instructions
+
+    def run(self, state, steps, limits=None):
+        # type: (State, tuple, Limits) -> None
+        # generated code runs from starts of basic blocks, rest of instructions is executed by exact steps,
+        # generated code returns before block over budget, so limits are checked here
+        program_length = len(steps)
+        budget = limits.check(state) if limits else UNLIMITED
+        while state.program_counter < program_length:
+            program_counter = state.program_counter
+            size = self._sizes.get(program_counter)
+            if state.executed_instructions + (size or 1) > budget:
+                budget = limits.check(state, size or 1)
+            if size and state.executed_instructions + size <= budget:
+                try:
+                    self._function(state, program_counter, budget)
+                    continue
+                except Exception as e:
+                    # failed instruction is executed by exact step
+                    self._deoptimize(state, e)
+
+            program_counter = state.program_counter
+            steps[program_counter](state)
+            if program_counter == state.program_counter:
+                # increment only in case of not manipulating with PC
+                state.program_counter += 1
+
+    def _deoptimize(self, state, e):
+        # type: (State, Exception) -> None
+        traceback = e.__traceback__
+        while traceback is not None and traceback.tb_frame.f_code is not self._code:
+            traceback = traceback.tb_next
+        failure = self._failures.get(traceback.tb_lineno) if traceback is not None else None
+        if failure is None:
+            raise e
+        index, exact = failure
+        instruction_price, operand_price, count, program_line = self._refunds.get(index)
+        state.instruction_price -= instruction_price
+        state.operand_price -= operand_price
+        state.executed_instructions -= count
+        if program_line is not None:
+            state.program_line = program_line
+        state.program_counter = index
+        if exact:
+            # failed already exactly
+            raise e
+
+
+def transpile(instructions, global_layout, local_layout):
+    # type: (list, dict, dict) -> TranspiledProgram
+    # None for program out of supported subset
+    if not instructions or global_layout is None or local_layout is None:
+        # frames without slots
+        return None
+    emitter = _Emitter(instructions, global_layout, local_layout)
+    source = emitter.source()
+    try:
+        with warnings.catch_warnings():
+            # subscripts of constants are valid, they fail on execution as in other engines
+            warnings.simplefilter('ignore', SyntaxWarning)
+            code = compile(source, FILENAME, 'exec')
+    except (SyntaxError, ValueError, RecursionError, MemoryError) as e:
+        logging.warning('Unable to transpile program ({}).'.format(e))
+        return None
+    namespace = emitter.namespace
+    exec(code, namespace)
+    return TranspiledProgram(
+        namespace.get('program'),
+        emitter.failures,
+        emitter.refunds,
+        {start: end - start for start, end in split_blocks(instructions)}
+    )
+
+
+__all__ = ['TranspiledProgram', 'transpile']
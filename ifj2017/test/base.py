@@ -1,6 +1,7 @@
 # coding=utf-8
 from collections import namedtuple
 
+from ..interpreter.profiler import Profiler
 from ..interpreter.state import State
 
 TestInfo = namedtuple(
@@ -9,6 +10,15 @@ TestInfo = namedtuple(
 )
 
 
+class PriceSummary(namedtuple('PriceSummary', 'instruction_price operand_price')):
+    # price of program without whole state, for results restored from cache
+    __slots__ = ()
+
+    @property
+    def price(self):
+        return self.instruction_price + self.operand_price
+
+
 class TestReport(object):
     compiler_stdout = None
     compiler_stderr = None
@@ -18,14 +28,19 @@ class TestReport(object):
     interpreter_stderr = None
     interpreter_exit_code = None
 
-    state = None  # type: State
+    state = None  # type: State or PriceSummary
     test_info = None  # type: TestInfo
 
     groot_price = None  # type: int
+    # breakdown of price, if reference interpreter reports it
+    groot_instruction_price = None  # type: int
+    groot_operand_price = None  # type: int
+
+    profiler = None  # type: Profiler
 
     success = None
 
     skipped = None
 
 
-__all__ = ['TestReport', 'TestInfo']
+__all__ = ['TestReport', 'TestInfo', 'PriceSummary']
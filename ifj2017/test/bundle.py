@@ -0,0 +1,103 @@
+# coding=utf-8
+import json
+import mmap
+import os
+import os.path as path
+import struct
+import sys
+from tempfile import mkstemp
+
+# 8B magic, 8B length of JSON index, index and then data of all files, offsets in index are relative to data
+_MAGIC = b'IFJ17TB\x03'
+_HEADER = struct.Struct('<8sQ')
+
+
+# all test files of corpus packed to one memory-mapped file, index maps section and file name to offset and length
+# of packed file, data of files are decoded directly from mapped memory without any further syscalls
+class TestBundle(object):
+    SUFFIX = '.bundle'
+
+    def __init__(self, bundle_file):
+        # type: (str) -> None
+        with open(bundle_file, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, index_length = _HEADER.unpack_from(self._map)
+        if magic != _MAGIC:
+            raise ValueError('File {} is not bundle of tests.'.format(bundle_file))
+        self._view = memoryview(self._map)
+        index_end = _HEADER.size + index_length
+        self.sections = json.loads(str(self._view[_HEADER.size:index_end], encoding='utf-8'))  # type: dict
+        self._data_start = index_end
+
+    @classmethod
+    def bundle_file(cls, tests_dir):
+        # type: (str) -> str
+        return ''.join((path.normpath(tests_dir), cls.SUFFIX))
+
+    @classmethod
+    def open(cls, tests_dir):
+        # type: (str) -> TestBundle
+        # bundle of given tests dir, if exists and is valid
+        try:
+            return cls(cls.bundle_file(tests_dir))
+        except (OSError, ValueError, struct.error):
+            return None
+
+    def read(self, entry):
+        # type: (list) -> str
+        offset, length = entry
+        start = self._data_start + offset
+        return str(self._view[start:start + length], encoding='utf-8')
+
+    @classmethod
+    def build(cls, tests_dir, bundle_file):
+        # type: (str, str) -> int
+        # packs all files of sections in tests dir, returns count of packed files
+        sections = {}
+        chunks = []
+        offset = 0
+        for section in sorted(os.listdir(tests_dir)):
+            section_dir = path.join(tests_dir, section)
+            if not path.isdir(section_dir):
+                continue
+            files = sections[section] = {}
+            for name in sorted(os.listdir(section_dir)):
+                file = path.join(section_dir, name)
+                if not path.isfile(file):
+                    continue
+                with open(file, 'rb') as f:
+                    content = f.read()
+                files[name] = (offset, len(content))
+                chunks.append(content)
+                offset += len(content)
+
+        index = bytes(json.dumps(sections, sort_keys=True), encoding='utf-8')
+        fd, temp_file = mkstemp(dir=path.dirname(path.abspath(bundle_file)))
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(_HEADER.pack(_MAGIC, len(index)))
+                f.write(index)
+                for chunk in chunks:
+                    f.write(chunk)
+            # temporary file is readable only by owner
+            os.chmod(temp_file, 0o644)
+            os.replace(temp_file, bundle_file)
+        except OSError:
+            os.remove(temp_file)
+            raise
+        return len(chunks)
+
+
+def main():
+    # python -m ifj2017.test.bundle [tests dir [bundle file]]
+    from .. import __PROJECT_ROOT__
+    tests_dir = sys.argv[1] if len(sys.argv) > 1 else path.join(__PROJECT_ROOT__, 'ifj2017/tests')
+    bundle_file = sys.argv[2] if len(sys.argv) > 2 else TestBundle.bundle_file(tests_dir)
+    count = TestBundle.build(tests_dir, bundle_file)
+    print('Packed {} files from {} to {}.'.format(count, tests_dir, bundle_file), file=sys.stderr)
+
+
+__all__ = ['TestBundle']
+
+if __name__ == '__main__':
+    main()
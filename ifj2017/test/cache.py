@@ -0,0 +1,78 @@
+# coding=utf-8
+import hashlib
+import os.path as path
+
+from .base import TestInfo, TestReport, PriceSummary
+from ..interpreter.cache import FileCache
+
+
+# cache of test case results addressed by hash of used binaries, sources of python interpreter and runner, test case
+# and settings of runner affecting its result, only results of finished stages without any error (timeout etc.)
+# are cached
+class ResultCache(FileCache):
+    FORMAT_VERSION = 2
+    SUFFIX = '.ifjr'
+    # runner parses output of reference interpreter
+    SOURCES = FileCache.SOURCES + (path.dirname(path.abspath(__file__)),)
+
+    REPORT_FIELDS = (
+        'compiler_stdout',
+        'compiler_stderr',
+        'compiler_exit_code',
+        'interpreter_stdout',
+        'interpreter_stderr',
+        'interpreter_exit_code',
+        'groot_price',
+        'groot_instruction_price',
+        'groot_operand_price',
+    )
+
+    def __init__(self, cache_dir, binaries, settings, **kwargs):
+        # type: (str, tuple, tuple, dict) -> None
+        super(ResultCache, self).__init__(cache_dir, **kwargs)
+        self._key = '\0'.join(self._hash_file(binary) if binary else '' for binary in binaries)
+        self._settings = settings
+
+    @staticmethod
+    def _hash_file(file):
+        # type: (str) -> str
+        hash_ = hashlib.sha1()
+        with open(file, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 16), b''):
+                hash_.update(chunk)
+        return hash_.hexdigest()
+
+    def _test_entry_file(self, test_info):
+        # type: (TestInfo) -> str
+        return self._entry_file(self._key, repr((
+            test_info.code,
+            test_info.stdin,
+            test_info.stdout,
+            test_info.compiler_exit_code,
+            test_info.interpreter_exit_code,
+            sorted(test_info.extensions),
+            test_info.timeout,
+            self._settings,
+        )))
+
+    def load(self, report, test_info):
+        # type: (TestReport, TestInfo) -> bool
+        # fills report by cached results of test case, returns True in case of hit
+        result = self._load(self._test_entry_file(test_info))
+        if result is None:
+            return False
+        fields, price = result
+        for name, value in zip(self.REPORT_FIELDS, fields):
+            setattr(report, name, value)
+        report.state = PriceSummary(*price) if price else None
+        return True
+
+    def store(self, report, test_info):
+        # type: (TestReport, TestInfo) -> None
+        self._store(self._test_entry_file(test_info), (
+            tuple(getattr(report, name) for name in self.REPORT_FIELDS),
+            (report.state.instruction_price, report.state.operand_price) if report.state else None
+        ))
+
+
+__all__ = ['ResultCache']
@@ -0,0 +1,68 @@
+# coding=utf-8
+import os
+import os.path as path
+from contextlib import contextmanager
+from tempfile import mkstemp
+
+
+# creates files with code for interpreter, preferably only in memory without any filesystem churn
+class CodeFileFactory(object):
+    AUTO = 'auto'
+    MEMFD = 'memfd'  # anonymous in-memory file passed to process as /dev/fd/N
+    SHM = 'shm'  # file in tmpfs scratch area
+    TEMP = 'temp'  # file in default temporary dir
+
+    MODES = (AUTO, MEMFD, SHM, TEMP)
+
+    SHM_DIR = '/dev/shm'
+    PREFIX = 'ifjcode17-'
+
+    def __init__(self, mode=AUTO):
+        # type: (str) -> None
+        assert mode in self.MODES, 'Unknown mode of code files {}.'.format(mode)
+        self.mode = self._resolve_mode(mode)
+
+    @classmethod
+    def _resolve_mode(cls, mode):
+        # falls back to next slower mode, when requested one is not supported by platform
+        if mode in (cls.AUTO, cls.MEMFD) and cls._memfd_supported():
+            return cls.MEMFD
+        if mode in (cls.AUTO, cls.MEMFD, cls.SHM) and path.isdir(cls.SHM_DIR) and os.access(cls.SHM_DIR, os.W_OK):
+            return cls.SHM
+        return cls.TEMP
+
+    @staticmethod
+    def _memfd_supported():
+        if not hasattr(os, 'memfd_create') or not path.isdir('/dev/fd'):
+            return False
+        try:
+            os.close(os.memfd_create(CodeFileFactory.PREFIX))
+        except OSError:
+            return False
+        return True
+
+    @contextmanager
+    def create(self, content):
+        # type: (bytes) -> tuple
+        # yields path to file with given content and file descriptors to pass to process reading the file
+        if self.mode == self.MEMFD:
+            # close on exec, so only process with explicitly passed descriptor inherits it
+            fd = os.memfd_create(self.PREFIX)
+            try:
+                with open(fd, 'wb', closefd=False) as f:
+                    f.write(content)
+                yield '/dev/fd/{}'.format(fd), (fd,)
+            finally:
+                os.close(fd)
+            return
+
+        fd, file = mkstemp(prefix=self.PREFIX, dir=self.SHM_DIR if self.mode == self.SHM else None)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(content)
+            yield file, ()
+        finally:
+            os.remove(file)
+
+
+__all__ = ['CodeFileFactory']
@@ -0,0 +1,159 @@
+# coding=utf-8
+import difflib
+from time import monotonic
+
+
+class DiffBudgetExceeded(Exception):
+    pass
+
+
+# grouping of opcodes to hunks reused from difflib for opcodes computed by other algorithm
+class _Opcodes(difflib.SequenceMatcher):
+    def __init__(self, opcodes):
+        # type: (list) -> None
+        self._opcodes = opcodes
+
+    def get_opcodes(self):
+        return self._opcodes
+
+
+def _format_range(start, stop):
+    # same as in difflib
+    beginning = start + 1
+    length = stop - start
+    if length == 1:
+        return '{}'.format(beginning)
+    if not length:
+        beginning -= 1
+    return '{},{}'.format(beginning, length)
+
+
+def unified_diff(a, b, opcodes, n=3, fromfile='', tofile=''):
+    # type: (list, list, list, int, str, str) -> iterable
+    # lines of unified diff from opcodes in format of difflib.SequenceMatcher.get_opcodes
+    started = False
+    for group in _Opcodes(opcodes).get_grouped_opcodes(n):
+        if not started:
+            started = True
+            yield '--- {}\n'.format(fromfile)
+            yield '+++ {}\n'.format(tofile)
+
+        first, last = group[0], group[-1]
+        yield '@@ -{} +{} @@\n'.format(_format_range(first[1], last[2]), _format_range(first[3], last[4]))
+        for tag, i1, i2, j1, j2 in group:
+            if tag == 'equal':
+                for line in a[i1:i2]:
+                    yield ' ' + line
+                continue
+            for line in a[i1:i2]:
+                yield '-' + line
+            for line in b[j1:j2]:
+                yield '+' + line
+
+
+# diff by difflib, worst-case quadratic, so only for limited count of line pairs and without time budget
+class DifflibBackend(object):
+    MAX_LINE_PAIRS = 1000000
+
+    def __init__(self, time_budget=None):
+        # type: (float) -> None
+        pass
+
+    def diff(self, a, b, n=3, fromfile='', tofile=''):
+        # type: (list, list, int, str, str) -> iterable
+        if len(a) * len(b) > self.MAX_LINE_PAIRS:
+            raise DiffBudgetExceeded()
+        return difflib.unified_diff(a, b, fromfile=fromfile, tofile=tofile, n=n)
+
+
+# greedy Myers algorithm in O((N + M) * D) for D differences, both count of differences and time are limited
+class MyersBackend(object):
+    MAX_EDITS = 1000
+    DEADLINE_CHECK_INTERVAL = 16  # differences between checks of time budget
+
+    def __init__(self, time_budget=None):
+        # type: (float) -> None
+        self._time_budget = time_budget
+
+    def diff(self, a, b, n=3, fromfile='', tofile=''):
+        # type: (list, list, int, str, str) -> iterable
+        return unified_diff(a, b, self._opcodes(a, b), n=n, fromfile=fromfile, tofile=tofile)
+
+    def _opcodes(self, a, b):
+        # type: (list, list) -> list
+        equal = self._equal(a, b)
+        opcodes = []
+        i = j = 0
+        for x, y in equal + [(len(a), len(b))]:
+            if x > i or y > j:
+                tag = 'replace' if x > i and y > j else ('delete' if x > i else 'insert')
+                opcodes.append((tag, i, x, j, y))
+            if x < len(a) or y < len(b):
+                if opcodes and opcodes[-1][0] == 'equal' and opcodes[-1][2] == x:
+                    _, i1, _, j1, _ = opcodes.pop()
+                    opcodes.append(('equal', i1, x + 1, j1, y + 1))
+                else:
+                    opcodes.append(('equal', x, x + 1, y, y + 1))
+            i, j = x + 1, y + 1
+        return opcodes
+
+    def _equal(self, a, b):
+        # type: (list, list) -> list
+        # pairs of indexes of equal lines in shortest edit script
+        len_a, len_b = len(a), len(b)
+        max_edits = min(len_a + len_b, self.MAX_EDITS)
+        deadline = monotonic() + self._time_budget if self._time_budget else None
+        offset = max_edits + 1
+        v = [0] * (2 * max_edits + 3)  # furthest x on diagonal k = x - y, stored at k + offset
+        trace = []  # v[-d..d] before each step d
+
+        for d in range(max_edits + 1):
+            if deadline and not d % self.DEADLINE_CHECK_INTERVAL and monotonic() > deadline:
+                raise DiffBudgetExceeded()
+            trace.append(v[offset - d:offset + d + 1])
+            for k in range(-d, d + 1, 2):
+                if k == -d or (k != d and v[k - 1 + offset] < v[k + 1 + offset]):
+                    x = v[k + 1 + offset]
+                else:
+                    x = v[k - 1 + offset] + 1
+                y = x - k
+                while x < len_a and y < len_b and a[x] == b[y]:
+                    x += 1
+                    y += 1
+                v[k + offset] = x
+                if x >= len_a and y >= len_b:
+                    return self._backtrack(trace, len_a, len_b)
+        raise DiffBudgetExceeded()
+
+    @staticmethod
+    def _backtrack(trace, x, y):
+        # type: (list, int, int) -> list
+        equal = []
+        for d in range(len(trace) - 1, 0, -1):
+            v = trace[d]  # indexed by k + d
+            k = x - y
+            if k == -d or (k != d and v[k - 1 + d] < v[k + 1 + d]):
+                previous_k = k + 1
+            else:
+                previous_k = k - 1
+            previous_x = v[previous_k + d]
+            previous_y = previous_x - previous_k
+            while x > previous_x and y > previous_y:
+                x -= 1
+                y -= 1
+                equal.append((x, y))
+            x, y = previous_x, previous_y
+        while x > 0 and y > 0:
+            x -= 1
+            y -= 1
+            equal.append((x, y))
+        equal.reverse()
+        return equal
+
+
+BACKENDS = {
+    'myers': MyersBackend,
+    'difflib': DifflibBackend,
+}
+
+__all__ = ['DiffBudgetExceeded', 'DifflibBackend', 'MyersBackend', 'BACKENDS', 'unified_diff']
@@ -2,54 +2,86 @@
 import json
 import os
 import os.path as path
-from glob import iglob
-from operator import attrgetter
+from collections import Counter
+from functools import partial
 from os.path import basename
-from typing import Set, Tuple, Optional
-
 from .base import TestInfo
+from .bundle import TestBundle
 from .logger import TestLogger
+from .wildcard import WildcardMatcher
 
 
 class TestLoader(object):
-    def __init__(self, tests_dir, default_timeout, tests_wildcards):
+    def __init__(self, tests_dir, default_timeout, tests_wildcards, use_bundle=True):
         assert path.isdir(tests_dir), "Given tests dir is valid filesystem folder."
 
         self._tests_dir = tests_dir
         self._default_timeout = default_timeout
-        self._tests_wildcards = self._parse_wildcards(tests_wildcards)  # type: Set[Tuple[str, Optional[str]]]
+        self._wildcards = WildcardMatcher(tests_wildcards)
+        # bundle is authoritative for installed tests, tests in checkout of repository are edited, so they're read
+        # from disk
+        self._bundle = TestBundle.open(tests_dir) if use_bundle and not self.is_checkout(tests_dir) else None
+
+    @staticmethod
+    def is_checkout(tests_dir):
+        # type: (str) -> bool
+        root = path.dirname(path.dirname(path.abspath(tests_dir)))
+        return path.exists(path.join(root, '.git')) and path.isfile(path.join(root, 'setup.py'))
 
     def load_section_dirs(self):
         return sorted(
             path.join(self._tests_dir, dir_)
             for dir_
-            in os.listdir(self._tests_dir)
-            if path.isdir(path.join(self._tests_dir, dir_))
-            and self._allow_wildcard(dir_)
+            in (self._bundle.sections if self._bundle else os.listdir(self._tests_dir))
+            if (self._bundle or path.isdir(path.join(self._tests_dir, dir_)))
+            and self._wildcards.allows(dir_)
         )
 
     def load_tests(self, section_dir):
-        assert path.isdir(section_dir)
-
-        json_data = self._load_json_file(section_dir)
-        compact_tests = self._load_compact_tests(section_dir, json_data)
-        already_loaded = set(map(attrgetter('name'), compact_tests))
-        file_tests = self._load_file_tests(section_dir, already_loaded, json_data)
+        # yields test cases sorted by names, files of test case are read from disk only when it's reached
+        assert self._bundle or path.isdir(section_dir)
+
+        index = self._load_index(section_dir)
+        json_data = self._load_json_file(section_dir, index)
+        compact_tests = self._load_compact_tests(section_dir, index, json_data)
+        already_loaded = set(name for name, _ in compact_tests)
+        file_tests = self._load_file_tests(section_dir, index, already_loaded, json_data)
         tests = tuple(file_tests) + tuple(compact_tests)
-        test_names = tuple(map(attrgetter('name'), tests))
-        conflicting = set(test for test in test_names if test_names.count(test) > 1)
+        conflicting = set(name for name, count in Counter(name for name, _ in tests).items() if count > 1)
         if conflicting:
             TestLogger.log_warning('Conflicting test case names: {}.'.format(', '.join(sorted(conflicting))))
-            return ()
-
-        return sorted(
-            tests,
-            key=lambda test: (len(test.name), test.name)
-        )
-
-    def _load_json_file(self, section_dir):
-        data = self.load_file(
-            path.join(section_dir, 'tests.json'),
+            return
+
+        for name, load in sorted(
+                tests,
+                key=lambda test: (len(test[0]), test[0])
+        ):
+            test_info = load()
+            if test_info is not None:
+                yield test_info
+
+    def _load_index(self, section_dir):
+        # type: (str) -> dict
+        # one listing of section instead of probing each possible file of each test case, maps name of file
+        # to its entry in bundle or to None for file read from disk
+        if self._bundle:
+            return dict(self._bundle.sections.get(basename(section_dir), {}))
+        return dict.fromkeys(os.listdir(section_dir))
+
+    def _read_file(self, section_dir, index, file, allow_fail=False):
+        # type: (str, dict, str, bool) -> str
+        entry = index.get(file)
+        if entry is not None:
+            return self._bundle.read(entry)
+        return self.load_file(path.join(section_dir, file), allow_fail=allow_fail)
+
+    def _load_json_file(self, section_dir, index):
+        if 'tests.json' not in index:
+            return {}
+        data = self._read_file(
+            section_dir,
+            index,
+            'tests.json',
             allow_fail=True
         )
         if not data:
@@ -62,7 +94,8 @@ class TestLoader(object):
             )
             return {}
 
-    def _load_compact_tests(self, section_dir, data):
+    def _load_compact_tests(self, section_dir, index, data):
+        # returns pairs of test name and loader of its TestInfo
         cases = []
         extensions = tuple(data.get('extensions', ()))
         try:
@@ -79,86 +112,81 @@ class TestLoader(object):
                 if not name:
                     name = '{:03}'.format(i + 1)
 
-                if not self._allow_wildcard(basename(section_dir), name):
+                if not self._wildcards.allows(basename(section_dir), name):
                     continue
 
-                if not code:
-                    code = self._load_test_file(section_dir, name, 'code')
-
-                if not code and not test_case.get('allow_empty'):
+                if not code and not test_case.get('allow_empty') and not self._has_test_file(
+                        section_dir, index, name, 'code'
+                ):
                     TestLogger.log_warning('Test {} has not defined code, skipping.'.format(name))
                     continue
 
-                cases.append(
-                    TestInfo(
-                        name,
-                        code,
-                        test_case.get('stdin') or self._load_test_file(section_dir, name, 'stdin'),
-                        test_case.get('stdout') or self._load_test_file(section_dir, name, 'stdout'),
-                        int(
-                            test_case.get('compiler_exit_code') or
-                            self._load_test_file(section_dir, name, 'cexitcode') or 0
-                        ),
-                        int(
-                            test_case.get('interpreter_exit_code') or
-                            self._load_test_file(section_dir, name, 'iexitcode') or 0
-                        ),
-                        test_case.get('info') or
-                        self._load_test_file(section_dir, name, 'info') or
-                        self._get_code_info(code),
-                        section_dir,
-                        set(tuple(test_case.get('extensions', ())) + extensions),
-                        test_case.get('timeout') or self._default_timeout
-                    )
-                )
+                cases.append((name, partial(
+                    self._load_compact_test,
+                    section_dir,
+                    index,
+                    name,
+                    test_case,
+                    set(tuple(test_case.get('extensions', ())) + extensions)
+                )))
         except TypeError as e:
             TestLogger.log_warning("Cannot load test cases: {}.".format(e))
             return ()
         return cases
 
-    def _load_file_tests(self, section_dir, already_loaded, data):
+    def _load_compact_test(self, section_dir, index, name, test_case, extensions):
+        code = test_case.get('code') or self._load_test_file(section_dir, index, name, 'code')
+        return TestInfo(
+            name,
+            code,
+            test_case.get('stdin') or self._load_test_file(section_dir, index, name, 'stdin'),
+            test_case.get('stdout') or self._load_test_file(section_dir, index, name, 'stdout'),
+            int(
+                test_case.get('compiler_exit_code') or
+                self._load_test_file(section_dir, index, name, 'cexitcode') or 0
+            ),
+            int(
+                test_case.get('interpreter_exit_code') or
+                self._load_test_file(section_dir, index, name, 'iexitcode') or 0
+            ),
+            test_case.get('info') or
+            self._load_test_file(section_dir, index, name, 'info') or
+            self._get_code_info(code),
+            section_dir,
+            extensions,
+            test_case.get('timeout') or self._default_timeout
+        )
+
+    def _load_file_tests(self, section_dir, index, already_loaded, data):
+        # returns pairs of test name and loader of its TestInfo
         extensions = tuple(data.get('extensions', ()))
-        for code_file in sorted(iglob(path.join(section_dir, "*.code"))):
-            name, _ = path.splitext(path.basename(code_file))
+        for code_file in sorted(file for file in index if file.endswith('.code')):
+            name, _ = path.splitext(code_file)
             if name in already_loaded:
                 continue
-            if not self._allow_wildcard(basename(section_dir), name):
+            if not self._wildcards.allows(basename(section_dir), name):
                 continue
-            try:
-                code = self.load_file(code_file)
-                info = TestInfo(
-                    name,
-                    code,
-                    self._load_test_file(section_dir, name, 'stdin'),
-                    self._load_test_file(section_dir, name, 'stdout'),
-                    int(self._load_test_file(section_dir, name, 'cexitcode') or 0),
-                    int(self._load_test_file(section_dir, name, 'iexitcode') or 0),
-                    self._load_test_file(section_dir, name, 'info') or self._get_code_info(code) or '',
-                    section_dir,
-                    set(extensions),
-                    self._default_timeout
-                )
-            except ValueError as e:
-                TestLogger.log_warning("Unable to load file {}: {}".format(code_file, e))
-                continue
-            yield info
-
-    def _allow_wildcard(self, section, name=None):
-        if not self._tests_wildcards:
-            return True
+            yield name, partial(self._load_file_test, section_dir, index, name, extensions)
 
-        if name:
-            return any(
-                section_wc in section and (name_wc is None or name == name_wc)
-                for section_wc, name_wc
-                in self._tests_wildcards
+    def _load_file_test(self, section_dir, index, name, extensions):
+        code_file = path.join(section_dir, '.'.join((name, 'code')))
+        try:
+            code = self._read_file(section_dir, index, basename(code_file))
+            return TestInfo(
+                name,
+                code,
+                self._load_test_file(section_dir, index, name, 'stdin'),
+                self._load_test_file(section_dir, index, name, 'stdout'),
+                int(self._load_test_file(section_dir, index, name, 'cexitcode') or 0),
+                int(self._load_test_file(section_dir, index, name, 'iexitcode') or 0),
+                self._load_test_file(section_dir, index, name, 'info') or self._get_code_info(code) or '',
+                section_dir,
+                set(extensions),
+                self._default_timeout
             )
-
-        return any(
-            section_wc in section
-            for section_wc, name_wc
-            in self._tests_wildcards
-        )
+        except ValueError as e:
+            TestLogger.log_warning("Unable to load file {}: {}".format(code_file, e))
+            return None
 
     @classmethod
     def _get_code_info(cls, code):
@@ -169,30 +197,25 @@ class TestLoader(object):
         )
 
     @staticmethod
-    def _parse_wildcards(tests_wildcards):
-        wildcards = set()
-        for wildcard in filter(None, tests_wildcards):
-            parts = tuple(filter(None, wildcard.split('/')))
-            parts_count = len(parts)
-            if parts_count == 1:
-                section, name = parts[0], None
-            elif parts_count == 2:
-                section, name = parts
-            else:
-                TestLogger.log_warning('Invalid wildcard {}, skipping.'.format(wildcard))
-                continue
-            wildcards.add((section, name))
-        return wildcards
-
-    def _load_test_file(self, section_dir, test_name, type_):
+    def _has_test_file(section_dir, index, test_name, type_):
+        # non-empty file of test case
+        file = '.'.join((test_name, type_))
+        if file not in index:
+            return False
+        entry = index[file]
+        return (entry[1] if entry is not None else path.getsize(path.join(section_dir, file))) > 0
+
+    def _load_test_file(self, section_dir, index, test_name, type_):
+        file = '.'.join((test_name, type_))
+        if file not in index:
+            return ''
         # splitlines is not possible due endlines at and of file
         return (
                    (
-                       self.load_file(
-                           path.join(
-                               section_dir,
-                               '.'.join((test_name, type_))
-                           ),
+                       self._read_file(
+                           section_dir,
+                           index,
+                           file,
                            allow_fail=True
                        ) or '').replace('\r\n', '\n').replace('\r', '\n')  # normalize newlines to \n
                ) or ''
@@ -201,7 +224,7 @@ class TestLoader(object):
     def load_file(file, allow_fail=False):
         assert allow_fail or (path.isfile(file) and os.access(file, os.R_OK))
         try:
-            with open(file, 'rbU') as f:
+            with open(file, 'rb') as f:
                 return f.read().decode('utf-8')
         except IOError:
             if not allow_fail:
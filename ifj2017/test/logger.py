@@ -3,6 +3,8 @@
 import os
 import shutil
 import sys
+import threading
+from contextlib import contextmanager
 from operator import attrgetter
 from typing import Optional
 
@@ -29,6 +31,21 @@ def disable_color():
     return not supported_platform or not is_a_tty
 
 
+# state of logged test case
+class TestCaseContext(object):
+    def __init__(self):
+        self.buffer = None
+        self.success = None
+        self.skipped = None
+        self.output = None  # captured output for deferred logging
+
+
+# actually logged test case, separated for each thread running test cases
+class _ThreadContext(threading.local):
+    def __init__(self):
+        self.test_case = TestCaseContext()
+
+
 class TestLogger(object):
     BLUE = '\033[94m'
     GREEN = '\033[32m'
@@ -44,17 +61,17 @@ class TestLogger(object):
     verbose = False
     console_width, console_height = shutil.get_terminal_size((120, 20))
 
-    _test_case_buffer = None
-    _test_case_success = None
-    _test_case_skipped = None
+    _thread_context = _ThreadContext()
 
     @classmethod
     def log(cls, *args, stream=sys.stderr, end=True, indent=0):
+        test_case = cls._thread_context.test_case
+
         def write(what):
-            if cls._test_case_buffer is not None:
-                cls._test_case_buffer.append(what)
+            if test_case.buffer is not None:
+                test_case.buffer.append(what)
             else:
-                stream.write(what)
+                cls._write(what, stream)
 
         write('\t' * indent)
         to_log = ''.join(map(str, filter(None, args)))
@@ -77,17 +94,17 @@ class TestLogger(object):
 
     @classmethod
     def log_test(cls, name, info=None):
-        cls._test_case_buffer = []
+        cls._thread_context.test_case.buffer = []
         cls.log(cls.BOLD, '{:3}'.format(name), info, ': ', indent=1, end=False)
 
     @classmethod
     def log_test_fail(cls, result):
-        cls._test_case_success = False
+        cls._thread_context.test_case.success = False
         cls.log(cls.BOLD, cls.WARNING, ' × ', result, end=False)
 
     @classmethod
     def log_test_ok(cls):
-        cls._test_case_success = True
+        cls._thread_context.test_case.success = True
         cls.log(cls.GREEN, cls.BOLD, '√', end=False)
 
     @classmethod
@@ -95,11 +112,42 @@ class TestLogger(object):
         cls.log(cls.FAIL, cls.BOLD, 'WARNING: ', warning, end=end)
 
     @classmethod
-    def log_end_test_case(cls):
+    def log_end_test_case(cls, success, skipped):
+        test_case = cls._thread_context.test_case
+        test_case.success = success
+        test_case.skipped = skipped
         cls.log()
-        if cls.verbose or not cls._test_case_success and not cls._test_case_skipped:
+        if cls.verbose or not test_case.success and not test_case.skipped:
             cls._log_buffer()
-        cls._test_case_buffer = None
+        test_case.buffer = None
+
+    @classmethod
+    @contextmanager
+    def test_case_context(cls, test_case):
+        # type: (TestCaseContext) -> None
+        # logs into given context, for test cases interleaved in one thread
+        previous, cls._thread_context.test_case = cls._thread_context.test_case, test_case
+        try:
+            yield test_case
+        finally:
+            cls._thread_context.test_case = previous
+
+    @classmethod
+    def capture_output(cls):
+        # everything logged in actual context is collected until release_output instead of writing to stream
+        cls._thread_context.test_case.output = []
+
+    @classmethod
+    def release_output(cls):
+        # type: () -> str
+        test_case = cls._thread_context.test_case
+        output, test_case.output = test_case.output, None
+        return ''.join(output or ())
+
+    @classmethod
+    def log_output(cls, output, stream=sys.stderr):
+        # type: (str, object) -> None
+        cls._write(output, stream)
 
     @classmethod
     def log_price(cls, state: State, groot_price: Optional[int]):
@@ -155,8 +203,16 @@ class TestLogger(object):
 
     @classmethod
     def _log_buffer(cls, stream=sys.stderr):
-        for to_log in cls._test_case_buffer or ():
-            stream.write(to_log)
+        for to_log in cls._thread_context.test_case.buffer or ():
+            cls._write(to_log, stream)
+
+    @classmethod
+    def _write(cls, what, stream):
+        output = cls._thread_context.test_case.output
+        if output is not None:
+            output.append(what)
+        else:
+            stream.write(what)
 
 
-__all__ = ['TestLogger']
+__all__ = ['TestLogger', 'TestCaseContext']
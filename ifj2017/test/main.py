@@ -6,7 +6,12 @@ from os import path
 
 import ifj2017
 from ifj2017 import __PROJECT_ROOT__
+from ifj2017.interpreter.interpreter import Interpreter
+from ifj2017.test.code_file import CodeFileFactory
+from ifj2017.test.diff import BACKENDS as DIFF_BACKENDS
 from ifj2017.test.runner import TestRunner
+from ifj2017.test.stdout import StdoutComparator
+from ifj2017.test.trust import GrootTrust
 
 
 def main():
@@ -20,7 +25,8 @@ def main():
         exit(1)
 
     parser.add_argument("compiler", help="path to IFJ17 compiler binary")
-    parser.add_argument('tests', nargs='*', help='wildcards to specify, which sections/tests run', default=[])
+    parser.add_argument('tests', nargs='*', help='wildcards to specify, which sections/tests run, '
+                                                   'glob patterns are supported (07_*/0?)', default=[])
     parser.add_argument("-i", "--interpreter", help="path to IFJ17 interpreter binary",
                         type=str, default=TestRunner.INTERPRETERS.get(platform.system()))
     parser.add_argument("-e", "--extensions-file", help="path to file with extensions 'rozsireni'")
@@ -29,6 +35,9 @@ def main():
                         action='store_true')
     parser.add_argument("-d", "--tests-dir", help="path to folder with tests to run",
                         type=str, default=path.join(__PROJECT_ROOT__, 'ifj2017/tests'))
+    parser.add_argument("--no-bundle", action='store_true', default=False,
+                        help="load tests from directories instead of packed bundle, which replaces tests dir "
+                             "outside of repository checkout")
     parser.add_argument("-l", "--log-dir", help="path to folder with logs",
                         type=str)
     parser.add_argument("-t", "--token-file", help="path to token file (default .TOKEN in log dir)",
@@ -37,10 +46,49 @@ def main():
                         type=str, default='https://ifj.josefkolar.cz')
     parser.add_argument("--command-timeout", help="maximal timeout for compiler and interpreter",
                         type=float, default=.25)
+    parser.add_argument("-j", "--jobs", help="count of test cases run concurrently",
+                        type=int, default=1)
+    parser.add_argument("--pipeline", action='store_true', default=False,
+                        help="run compilation, interpretation and price computation of test cases as pipeline, "
+                             "count of jobs limits each stage")
+    parser.add_argument("--code-files", help="how to pass compiled code to interpreter, unsupported modes fall "
+                                             "back to slower ones", choices=CodeFileFactory.MODES,
+                        default=CodeFileFactory.AUTO)
     parser.add_argument("--no-colors", action='store_true', help="disable colored output (for Windows CMD etc.)",
                         default=False)
-    parser.add_argument("--no-stdout-diff", action='store_true', help="disable stdout log by difflib",
+    parser.add_argument("--engine", help="engine of python interpreter used to compute price",
+                        choices=Interpreter.ENGINES, default=Interpreter.ENGINE_COMPILED)
+    parser.add_argument("--price-timeout", help="maximal timeout for python interpreter used to compute price as "
+                                                "multiple of timeout of test case, 0 disables it",
+                        type=float, default=TestRunner.DEFAULT_PRICE_TIMEOUT)
+    parser.add_argument("--price-instruction-limit", help="maximal count of instructions executed by python "
+                                                          "interpreter used to compute price", type=int)
+    parser.add_argument("--price-workers", help="count of worker processes used to compute price, "
+                                                "0 computes price in process of runner", type=int, default=0)
+    parser.add_argument("--price-memory-limit", help="maximal address space of price worker in MB",
+                        type=int, default=2048)
+    parser.add_argument("--trust-groot", action='store_true', default=False,
+                        help="use price from GROOT of reference interpreter instead of computing price by python "
+                             "interpreter, breakdown of price is taken from verified test cases, if not reported")
+    parser.add_argument("--trust-groot-sample", help="every N-th trusted price is verified by python interpreter, "
+                                                     "mismatch revokes trust", type=int,
+                        default=GrootTrust.DEFAULT_SAMPLE_INTERVAL)
+    parser.add_argument("--profile", action='store_true', help="profile price of tests per line, opcode and function, "
+                                                               "profiles are saved to logs", default=False)
+    parser.add_argument("--cache-dir", help="path to folder with cached data between runs",
+                        type=str, default=path.join(path.expanduser('~'), '.cache', 'ifjcode17-toolkit'))
+    parser.add_argument("--no-cache", action='store_true', help="disable caching of parsed programs and test results",
                         default=False)
+    parser.add_argument("--no-stdout-diff", action='store_true', help="disable stdout log by diff",
+                        default=False)
+    parser.add_argument("--stdout-diff-context", help="count of context lines in stdout diff in logs",
+                        type=int, default=StdoutComparator.DEFAULT_CONTEXT)
+    parser.add_argument("--stdout-diff-backend", help="algorithm of stdout diff in logs, myers is linear for "
+                                                      "similar outputs, but its hunks could differ from difflib ones",
+                        choices=tuple(sorted(DIFF_BACKENDS)), default='difflib')
+    parser.add_argument("--stdout-diff-budget", help="time limit in seconds for stdout diff of one test case, "
+                                                     "side by side view is logged instead after exceeding",
+                        type=float, default=StdoutComparator.DEFAULT_DIFF_BUDGET)
 
     parser.add_argument('-V', '--version', action='version', version='%(prog)s {}'.format(ifj2017.__version__))
 
@@ -0,0 +1,119 @@
+# coding=utf-8
+import multiprocessing
+import threading
+from io import StringIO
+
+try:
+    import resource
+except ImportError:
+    # rlimits are not available on Windows
+    resource = None
+
+from ..interpreter.cache import ParseCache
+from ..interpreter.exceptions import ExecutionLimitError
+from ..interpreter.interpreter import Interpreter
+
+
+class PriceWorkerError(RuntimeError):
+    pass
+
+
+class PriceWorkerTimeout(PriceWorkerError):
+    pass
+
+
+# state of worker process, set by initializer
+_worker = {}
+
+
+def _init_worker(engine, cache_dir, memory_limit):
+    # type: (str, str, int) -> None
+    if resource is not None and memory_limit:
+        limit = memory_limit * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    _worker['engine'] = engine
+    _worker['parse_cache'] = ParseCache(cache_dir) if cache_dir else None
+
+
+def _price(code, stdin, instruction_limit, time_limit):
+    # type: (str, str, int, float) -> tuple
+    # returns (instruction price, operand price) or (None, timeout flag, message), state is not sent back
+    try:
+        state = Interpreter(
+            code=code,
+            state_kwargs=dict(stdin=StringIO(stdin)),
+            engine=_worker['engine'],
+            parse_cache=_worker['parse_cache']
+        ).run(instruction_limit=instruction_limit, time_limit=time_limit)
+    except ExecutionLimitError as e:
+        return None, True, str(e)
+    except MemoryError:
+        return None, False, 'Memory limit exceeded.'
+    except Exception as e:
+        return None, False, str(e)
+    return state.instruction_price, state.operand_price
+
+
+# pool of long-lived worker processes computing price of programs, each worker has limited address space,
+# worker not responding after time limit of task is killed together with whole pool, which is started again
+class PricePool(object):
+    HARD_TIMEOUT_GRACE = 5.  # seconds after time limit of task to kill workers
+    ATTEMPTS = 2  # for tasks lost by restart of pool due to another task
+    # workers are not forked from runner, forked worker could inherit pipes of subprocess started meanwhile by
+    # another thread of runner and block its start or communication forever
+    START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+    def __init__(self, workers, engine, cache_dir=None, memory_limit=None):
+        # type: (int, str, str, int) -> None
+        assert workers > 0
+        self._workers = workers
+        self._initargs = (engine, cache_dir, memory_limit)
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def price(self, code, stdin, instruction_limit=None, time_limit=None):
+        # type: (str, str, int, float) -> tuple
+        # (instruction price, operand price) of program
+        for _ in range(self.ATTEMPTS):
+            pool = self._get_pool()
+            result = pool.apply_async(_price, (code, stdin, instruction_limit, time_limit))
+            try:
+                price = result.get(time_limit + self.HARD_TIMEOUT_GRACE if time_limit else None)
+            except multiprocessing.TimeoutError:
+                if self._restart(pool):
+                    raise PriceWorkerTimeout('Worker killed after time limit {}s.'.format(time_limit))
+                # pool was restarted meanwhile by another task, so this one is lost
+                continue
+            if price[0] is None:
+                _, timeout, message = price
+                raise (PriceWorkerTimeout if timeout else PriceWorkerError)(message)
+            return price
+        raise PriceWorkerError('Task lost by restart of workers.')
+
+    def close(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.terminate()
+                self._pool.join()
+                self._pool = None
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = multiprocessing.get_context(self.START_METHOD).Pool(
+                    self._workers, initializer=_init_worker, initargs=self._initargs
+                )
+            return self._pool
+
+    def _restart(self, pool):
+        # type: (multiprocessing.Pool) -> bool
+        with self._lock:
+            if pool is not self._pool:
+                return False
+            self._pool = None
+        pool.terminate()
+        pool.join()
+        return True
+
+
+__all__ = ['PricePool', 'PriceWorkerError', 'PriceWorkerTimeout']
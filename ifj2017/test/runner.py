@@ -1,23 +1,33 @@
 # coding=utf-8
-import difflib
+import asyncio
 import os
 import os.path as path
 import platform
+import re
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from io import StringIO
 from os.path import basename, abspath, isfile, dirname
 from subprocess import PIPE, Popen, TimeoutExpired
-from tempfile import mktemp
 
 import ifj2017
 from .base import TestInfo
-from .base import TestReport
+from .base import TestReport, PriceSummary
+from .cache import ResultCache
+from .code_file import CodeFileFactory
+from .diff import BACKENDS as DIFF_BACKENDS, DiffBudgetExceeded
 from .loader import TestLoader
-from .logger import TestLogger
+from .price_pool import PricePool, PriceWorkerTimeout
+from .stdout import StdoutComparator
+from .trust import GrootTrust
+from .logger import TestLogger, TestCaseContext
 from .. import __PROJECT_ROOT__
 from ..benchmark.uploader import BenchmarkUploader
+from ..interpreter.cache import ParseCache
+from ..interpreter.exceptions import ExecutionLimitError
 from ..interpreter.interpreter import Interpreter
+from ..interpreter.profiler import Profiler
 
 TEST_LOG_HEADER = """\
 # {}
@@ -58,6 +68,19 @@ _STDOUT_DIFF = """\
 STDOUT DIFF:
 # {}
 """
+# last line printed by GROOT of reference interpreter as 'I am Groot at <line> (<price>).', price could be followed
+# by its breakdown as '(<price> = <instruction price> + <operand price>)'
+_GROOT_RE = re.compile(r'^I am Groot at \d+ \((\d+)(?: = (\d+) \+ (\d+))?\)\.$')
+
+_PROFILE = """\
+# PROFILE:
+# {}
+
+"""
+_STDOUT_SIDE_BY_SIDE = """\
+STDOUT SIDE BY SIDE (diff budget exceeded):
+#   LINE {:<{width}}   {}
+{}"""
 
 
 class TestRunner(object):
@@ -67,6 +90,8 @@ class TestRunner(object):
         'Windows': path.join(__PROJECT_ROOT__, 'ifj2017/bin/windows/ic17int.exe'),
     }
     EXTENSION_FILE_NAME = 'rozsireni'
+    # python interpreter is much slower than reference one, 10s for default timeout of test case
+    DEFAULT_PRICE_TIMEOUT = 40.
 
     def __init__(self, args):
         super(TestRunner, self).__init__()
@@ -76,23 +101,65 @@ class TestRunner(object):
             "Given interpreter ({}) is file and is executable.".format(args.interpreter)
         assert isinstance(args.command_timeout, float) and args.command_timeout > 0, \
             'Command timeout is positive int'
+        assert args.price_timeout is None or (isinstance(args.price_timeout, float) and args.price_timeout >= 0), \
+            'Price timeout is non-negative float'
+        assert args.price_instruction_limit is None or args.price_instruction_limit > 0, \
+            'Price instruction limit is positive int'
+        assert isinstance(args.price_workers, int) and args.price_workers >= 0, \
+            'Count of price workers is non-negative int'
+        assert not (args.price_workers and args.profile), 'Profiling is not supported with price workers'
+        assert not (args.trust_groot and args.profile), 'Profiling is not supported with trusted GROOT prices'
+        assert isinstance(args.trust_groot_sample, int) and args.trust_groot_sample > 0, \
+            'Sample interval of trusted GROOT prices is positive int'
+        assert isinstance(args.jobs, int) and args.jobs > 0, 'Count of jobs is positive int'
+        assert isinstance(args.stdout_diff_context, int) and args.stdout_diff_context >= 0, \
+            'Context of stdout diff is non-negative int'
+        assert isinstance(args.stdout_diff_budget, float) and args.stdout_diff_budget > 0, \
+            'Budget of stdout diff is positive float'
 
         self._compiler_binary = args.compiler
         self._interpreter_binary = args.interpreter
         self._command_timeout = args.command_timeout
         self._log_dir = args.log_dir
+        self._jobs = args.jobs
+        self._pipeline = args.pipeline
+        self._code_files = CodeFileFactory(args.code_files)
         self._no_interpreter = args.no_interpreter
+        self._engine = args.engine
+        self._price_timeout = args.price_timeout
+        self._price_instruction_limit = args.price_instruction_limit
+        self._price_workers = args.price_workers
+        self._price_pool = PricePool(
+            args.price_workers,
+            engine=args.engine,
+            cache_dir=path.join(args.cache_dir, 'parse') if not args.no_cache else None,
+            memory_limit=args.price_memory_limit
+        ) if args.price_workers else None
+        self._groot_trust = GrootTrust(args.trust_groot_sample) if args.trust_groot else None
+        self._profile = args.profile
+        self._parse_cache = ParseCache(path.join(args.cache_dir, 'parse')) if not args.no_cache else None
         self._loader = TestLoader(
             args.tests_dir,
             args.command_timeout,
-            args.tests
+            args.tests,
+            use_bundle=not args.no_bundle
         )
         self._extensions_auto_loaded_from = False
         self._extensions = self._try_load_extensions(args.extensions_file, args.compiler)
+        self._result_cache = ResultCache(
+            path.join(args.cache_dir, 'results'),
+            binaries=(self._compiler_binary, None if self._no_interpreter else self._interpreter_binary),
+            # breakdown of trusted price is estimated
+            settings=(sorted(self._extensions), self._no_interpreter, self._groot_trust is not None)
+        ) if not args.no_cache and not args.profile else None  # cached results are without profile
         if args.no_colors:
             TestLogger.disable_colors = args.no_colors
         TestLogger.verbose = args.verbose
         self._no_stdout_diff = args.no_stdout_diff
+        self._stdout_comparator = StdoutComparator(
+            context=args.stdout_diff_context,
+            backend=DIFF_BACKENDS[args.stdout_diff_backend](time_budget=args.stdout_diff_budget)
+        )
         self._reports = []
 
         if not self._log_dir:
@@ -115,8 +182,6 @@ class TestRunner(object):
         else:
             os.mkdir(self._log_dir)
 
-        self._actual_section = None
-
     def run(self):
         self._welcome_message()
         self._uploader.check_connection()
@@ -126,7 +191,11 @@ class TestRunner(object):
             TestLogger.log_warning('Unable to authenticate user ({}), terminating...'.format(e))
             return 1
 
-        self._run_tests()
+        try:
+            self._run_tests()
+        finally:
+            if self._price_pool:
+                self._price_pool.close()
         result = TestLogger.log_results(self._reports)
         if self._uploader.has_connection:
             try:
@@ -146,15 +215,186 @@ class TestRunner(object):
         return result
 
     def _run_tests(self):
+        if self._pipeline:
+            return self._run_tests_pipelined()
+        if self._jobs > 1:
+            return self._run_tests_parallel()
+
         for test_section_dir in self._loader.load_section_dirs():
-            self._actual_section = path.basename(test_section_dir)
+            section = path.basename(test_section_dir)
 
-            TestLogger.log_section(self._actual_section)
-            os.mkdir(path.join(self._log_dir, self._actual_section))
+            TestLogger.log_section(section)
+            os.mkdir(path.join(self._log_dir, section))
             for test_info in self._loader.load_tests(test_section_dir):
-                self._run_test(test_info)
+                self._collect_report(self._run_test(section, test_info))
+
+    def _load_section(self, test_section_dir):
+        # type: (str) -> tuple
+        # loads section for deferred logging, returns name of section, pairs of output captured from loader
+        # before each test case with the test case and output of loader after last test case
+        section = path.basename(test_section_dir)
+        os.mkdir(path.join(self._log_dir, section))
+
+        tests = []
+        TestLogger.capture_output()
+        for test_info in self._loader.load_tests(test_section_dir):
+            tests.append((TestLogger.release_output(), test_info))
+            TestLogger.capture_output()
+        return section, tests, TestLogger.release_output()
+
+    def _run_tests_parallel(self):
+        # test cases are executed by pool of threads (mostly waiting for subprocesses), output of each test case
+        # is captured and logged in same order as in serial run, as soon as all previous test cases are done
+        with ThreadPoolExecutor(max_workers=self._jobs) as executor:
+            sections = []
+            for test_section_dir in self._loader.load_section_dirs():
+                section, tests, loader_output = self._load_section(test_section_dir)
+                sections.append((section, tuple(
+                    (test_loader_output, executor.submit(self._run_captured_test, section, test_info))
+                    for test_loader_output, test_info in tests
+                ), loader_output))
+
+            for section, futures, loader_output in sections:
+                TestLogger.log_section(section)
+                for test_loader_output, future in futures:
+                    TestLogger.log_output(test_loader_output)
+                    report, output = future.result()
+                    TestLogger.log_output(output)
+                    self._collect_report(report)
+                TestLogger.log_output(loader_output)
+
+    def _run_captured_test(self, section, test_info):
+        # type: (str, TestInfo) -> tuple
+        TestLogger.capture_output()
+        try:
+            report = self._run_test(section, test_info)
+        finally:
+            output = TestLogger.release_output()
+        return report, output
+
+    def _run_tests_pipelined(self):
+        # stages of test cases are executed by asyncio, so next test case could be compiled during interpretation
+        # of actual one and computing price of previous one, output is logged in same order as in serial run
+        loop = asyncio.ProactorEventLoop() if platform.system() == 'Windows' else asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        price_jobs = self._price_workers or self._jobs
+        try:
+            # executor runs price stage and blocking parts of test cases (checks, cache, logs), so the loop only
+            # waits for subprocesses
+            with ThreadPoolExecutor(max_workers=price_jobs + self._jobs) as executor:
+                loop.set_default_executor(executor)
+                loop.run_until_complete(self._run_pipeline(loop, price_jobs))
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
+
+    async def _run_pipeline(self, loop, price_jobs):
+        # subprocess stages are limited by count of jobs, price stage by count of price workers or jobs
+        stages = (
+            (asyncio.Semaphore(self._jobs), self._compile_async, self._check_compiled),
+            (asyncio.Semaphore(self._jobs), self._interpret_async, self._check_interpreted),
+            (asyncio.Semaphore(price_jobs), self._interpret_price_async, self._check_priced),
+        )
+        sections = []
+        for test_section_dir in self._loader.load_section_dirs():
+            section, tests, loader_output = self._load_section(test_section_dir)
+            sections.append((section, tuple(
+                (test_loader_output, loop.create_task(self._run_pipelined_test(section, test_info, stages)))
+                for test_loader_output, test_info in tests
+            ), loader_output))
+
+        for section, tasks, loader_output in sections:
+            TestLogger.log_section(section)
+            for test_loader_output, task in tasks:
+                TestLogger.log_output(test_loader_output)
+                report, output = await task
+                TestLogger.log_output(output)
+                self._collect_report(report)
+            TestLogger.log_output(loader_output)
+
+    async def _run_pipelined_test(self, section, test_info, stages):
+        # type: (str, TestInfo, tuple) -> tuple
+        loop = asyncio.get_event_loop()
+        test_case = TestCaseContext()
+
+        def in_executor(function, *args):
+            return loop.run_in_executor(None, self._run_in_test_case_context, test_case, function, *args)
+
+        with TestLogger.test_case_context(test_case):
+            TestLogger.capture_output()
+            report = self._begin_test(test_info)
+
+        if not report.skipped:
+            cached = self._result_cache is not None and await in_executor(self._result_cache.load, report, test_info)
+            failed = False
+            for limit, stage, check in stages:
+                error = None
+                if not cached:
+                    async with limit:
+                        error = await self._run_stage_async(stage, report, test_info)
+                failed = failed or error is not None
+                if not await in_executor(check, report, test_info, error):
+                    break
+            if not cached and not failed and self._result_cache is not None:
+                await in_executor(self._result_cache.store, report, test_info)
+
+        return await in_executor(self._save_captured_report, section, test_info, report)
+
+    @staticmethod
+    def _run_in_test_case_context(test_case, function, *args):
+        # type: (TestCaseContext, callable, tuple) -> object
+        with TestLogger.test_case_context(test_case):
+            return function(*args)
+
+    def _save_captured_report(self, section, test_info, report):
+        # type: (str, TestInfo, TestReport) -> tuple
+        self._save_report(section, test_info, report)
+        return report, TestLogger.release_output()
+
+    def _collect_report(self, report):
+        # type: (TestReport) -> None
+        self._reports.append(report)
+        if report.state:
+            self._uploader.collect_report(report)
+
+    def _run_test(self, section, test_info):
+        # type: (str, TestInfo) -> TestReport
+        report = self._begin_test(test_info)
+        if not report.skipped:
+            # cached test case passes through same checks as executed one
+            cached = self._result_cache is not None and self._result_cache.load(report, test_info)
+            failed = False
+            for stage, check in (
+                    (self._compile, self._check_compiled),
+                    (self._interpret, self._check_interpreted),
+                    (self._interpret_price, self._check_priced),
+            ):
+                error = None if cached else self._run_stage(stage, report, test_info)
+                failed = failed or error is not None
+                if not check(report, test_info, error):
+                    break
+            if not cached and not failed and self._result_cache is not None:
+                self._result_cache.store(report, test_info)
+        return self._save_report(section, test_info, report)
+
+    @staticmethod
+    def _run_stage(stage, report, test_info):
+        # type: (callable, TestReport, TestInfo) -> Exception
+        try:
+            stage(report, test_info)
+        except Exception as e:
+            return e
+
+    @staticmethod
+    async def _run_stage_async(stage, report, test_info):
+        # type: (callable, TestReport, TestInfo) -> Exception
+        try:
+            await stage(report, test_info)
+        except Exception as e:
+            return e
 
-    def _run_test(self, test_info):
+    def _begin_test(self, test_info):
+        # type: (TestInfo) -> TestReport
         report = TestReport()
         report.test_info = test_info
         report.skipped = None
@@ -166,25 +406,24 @@ class TestRunner(object):
         )
         if test_info.extensions - self._extensions:
             TestLogger.log(TestLogger.GREEN, ' skipping, required extension(s) {} is not activated.'.format(
-                ', '.join(test_info.extensions - self._extensions)
+                ', '.join(sorted(test_info.extensions - self._extensions))
             ), end=False)
             report.success = None
             report.skipped = True
-            self._save_report(test_info, report)
-            return
+        return report
 
-        try:
-            report.compiler_stdout, report.compiler_stderr, report.compiler_exit_code = self._compile(test_info)
-        except (TimeoutExpired, TimeoutError) as e:
+    # checks of stages results, returns True in case of test case continues by next stage
+
+    def _check_compiled(self, report, test_info, error):
+        # type: (TestReport, TestInfo, Exception) -> bool
+        if isinstance(error, (TimeoutExpired, TimeoutError)):
             TestLogger.log_test_fail('COMPILER TIMEOUT')
             report.success = False
-            self._save_report(test_info, report)
-            return
-        except Exception as e:
-            TestLogger.log_test_fail('FAIL TO RUN COMPILER ({})'.format(e))
+            return False
+        elif error:
+            TestLogger.log_test_fail('FAIL TO RUN COMPILER ({})'.format(error))
             report.success = False
-            self._save_report(test_info, report)
-            return
+            return False
 
         if test_info.compiler_exit_code is not None:
             if report.compiler_exit_code != test_info.compiler_exit_code:
@@ -192,28 +431,25 @@ class TestRunner(object):
                     test_info.compiler_exit_code, report.compiler_exit_code
                 ))
                 report.success = False
-                self._save_report(test_info, report)
-                return
+                return False
 
         TestLogger.log_test_ok()
         if report.compiler_exit_code != 0 or self._no_interpreter:
             # compiler stops this test case
             report.success = True
-            self._save_report(test_info, report)
-            return
+            return False
+        return True
 
-        try:
-            self._interpret(report, test_info)
-        except (TimeoutExpired, TimeoutError) as e:
+    def _check_interpreted(self, report, test_info, error):
+        # type: (TestReport, TestInfo, Exception) -> bool
+        if isinstance(error, (TimeoutExpired, TimeoutError)):
             TestLogger.log_test_fail('INTERPRETER TIMEOUT')
             report.success = False
-            self._save_report(test_info, report)
-            return
-        except Exception as e:
-            TestLogger.log_test_fail('FAIL TO RUN INTERPRETER ({})'.format(e))
+            return False
+        elif error:
+            TestLogger.log_test_fail('FAIL TO RUN INTERPRETER ({})'.format(error))
             report.success = False
-            self._save_report(test_info, report)
-            return
+            return False
 
         if test_info.interpreter_exit_code is not None:
             if report.interpreter_exit_code != test_info.interpreter_exit_code:
@@ -221,88 +457,206 @@ class TestRunner(object):
                     test_info.interpreter_exit_code, report.interpreter_exit_code
                 ))
                 report.success = False
-                self._save_report(test_info, report)
-                return
+                return False
 
         if report.interpreter_exit_code != 0:
             # interpreter stops this test case
             report.success = True
-            self._save_report(test_info, report)
-            return
+            return False
 
         TestLogger.log_test_ok()
 
         if test_info.stdout is not None:
-            if report.interpreter_stdout != test_info.stdout:
+            if test_info.stdout != report.interpreter_stdout:
                 TestLogger.log_test_fail("STDOUT")
                 report.success = False
-                self._save_report(test_info, report)
-                return
+                return False
         TestLogger.log_test_ok()
+        return True
 
-        try:
-            state = self._interpret_price(report.compiler_stdout, test_info)
-            report.state = state
-        except Exception as e:
-            TestLogger.log(TestLogger.WARNING, ' (fail: {})'.format(e))
+    def _check_priced(self, report, test_info, error):
+        # type: (TestReport, TestInfo, Exception) -> bool
+        if isinstance(error, (ExecutionLimitError, PriceWorkerTimeout)):
+            TestLogger.log_test_fail('PRICE TIMEOUT ({})'.format(error))
+            report.success = False
+            return False
+        elif error:
+            TestLogger.log(TestLogger.WARNING, ' (fail: {})'.format(error))
         else:
-            TestLogger.log_price(state=state, groot_price=report.groot_price)
-            self._uploader.collect_report(report)
+            TestLogger.log_price(state=report.state, groot_price=report.groot_price)
         report.success = True
-        self._save_report(test_info, report)
+        return False
 
-    def _compile(self, test_info):
-        # type: (TestInfo) -> tuple
-        process = Popen([self._compiler_binary], stdout=PIPE, stdin=PIPE, stderr=PIPE)
-        try:
-            out, err = process.communicate(bytes(test_info.code, encoding='utf-8'), timeout=test_info.timeout)
-        except (TimeoutError, TimeoutExpired):
-            process.kill()
-            raise
-        return out.decode('raw_unicode_escape'), err.decode('raw_unicode_escape'), process.returncode
+    # stages of test case, results are stored to report
+
+    def _compile(self, report, test_info):
+        # type: (TestReport, TestInfo) -> None
+        self._set_compiled(report, *self._communicate(
+            [self._compiler_binary],
+            bytes(test_info.code, encoding='utf-8'),
+            test_info.timeout
+        ))
 
-    def _interpret(self, report: TestReport, test_info: TestInfo) -> None:
-        code_temp = mktemp()
+    async def _compile_async(self, report, test_info):
+        # type: (TestReport, TestInfo) -> None
+        self._set_compiled(report, *(await self._communicate_async(
+            [self._compiler_binary],
+            bytes(test_info.code, encoding='utf-8'),
+            test_info.timeout
+        )))
+
+    @staticmethod
+    def _set_compiled(report, out, err, exit_code):
+        # type: (TestReport, bytes, bytes, int) -> None
+        report.compiler_stdout, report.compiler_stderr, report.compiler_exit_code = (
+            out.decode('raw_unicode_escape'), err.decode('raw_unicode_escape'), exit_code
+        )
+
+    def _interpret(self, report, test_info):
+        # type: (TestReport, TestInfo) -> None
+        with self._code_files.create(self._interpreted_code(report)) as (code_file, pass_fds):
+            self._set_interpreted(report, *self._communicate(
+                [self._interpreter_binary, '-v', code_file],
+                bytes(test_info.stdin, encoding='utf-8'),
+                test_info.timeout,
+                pass_fds
+            ))
+
+    async def _interpret_async(self, report, test_info):
+        # type: (TestReport, TestInfo) -> None
+        with self._code_files.create(self._interpreted_code(report)) as (code_file, pass_fds):
+            self._set_interpreted(report, *(await self._communicate_async(
+                [self._interpreter_binary, '-v', code_file],
+                bytes(test_info.stdin, encoding='utf-8'),
+                test_info.timeout,
+                pass_fds
+            )))
+
+    @staticmethod
+    def _interpreted_code(report):
+        # type: (TestReport) -> bytes
         # add GROOT at the end to compute price
-        with open(code_temp, 'wb') as f:
-            f.write(bytes('\n'.join((report.compiler_stdout, 'GROOT')), encoding='utf-8'))
+        return bytes('\n'.join((report.compiler_stdout, 'GROOT')), encoding='utf-8')
+
+    @staticmethod
+    def _set_interpreted(report, out, err, exit_code):
+        # type: (TestReport, bytes, bytes, int) -> None
+        out, err = out.decode('raw_unicode_escape'), err.decode('raw_unicode_escape')
+
+        lines = err.splitlines()
+        match = _GROOT_RE.match(lines[-1].strip()) if lines else None
+        if match:
+            price, instruction_price, operand_price = match.groups()
+            report.groot_price = int(price)
+            if instruction_price is not None and int(instruction_price) + int(operand_price) == report.groot_price:
+                # breakdown not matching price is ignored
+                report.groot_instruction_price, report.groot_operand_price = int(instruction_price), int(operand_price)
 
-        process = Popen([self._interpreter_binary, '-v', code_temp], stdout=PIPE, stdin=PIPE, stderr=PIPE)
-        try:
-            out, err = process.communicate(
-                input=bytes(test_info.stdin, encoding='utf-8'),
-                timeout=test_info.timeout
+        # err has non-escaped characters
+        report.interpreter_stdout, report.interpreter_stderr, report.interpreter_exit_code = out, err, exit_code
+
+    def _interpret_price(self, report, test_info):
+        # type: (TestReport, TestInfo) -> None
+        if self._groot_trust is None or report.groot_price is None:
+            return self._interpret_price_python(report, test_info)
+
+        if self._groot_trust.trusts(report):
+            report.state = self._groot_trust.price(report)
+            return
+        revoked = self._groot_trust.revoked
+        self._interpret_price_python(report, test_info)
+        if not self._groot_trust.verify(report) and not revoked:
+            TestLogger.log_warning(
+                'Price {} from reference interpreter does not match computed price {} ({}+{}), '
+                'trust to reference prices revoked.'.format(
+                    report.groot_price, report.state.price, report.state.instruction_price, report.state.operand_price
+                ),
+                end=False
             )
+
+    def _interpret_price_python(self, report, test_info):
+        # type: (TestReport, TestInfo) -> None
+        if self._price_pool:
+            report.state = PriceSummary(*self._price_pool.price(
+                report.compiler_stdout,
+                test_info.stdin,
+                instruction_limit=self._price_instruction_limit,
+                time_limit=self._price_time_limit(test_info)
+            ))
+            return
+        interpreter = Interpreter(code=report.compiler_stdout, state_kwargs=dict(
+            stdin=StringIO(test_info.stdin),
+        ), engine=self._engine, parse_cache=self._parse_cache)
+        report.profiler = Profiler().attach(interpreter) if self._profile else None
+        report.state = interpreter.run(
+            instruction_limit=self._price_instruction_limit,
+            time_limit=self._price_time_limit(test_info)
+        )
+
+    def _price_time_limit(self, test_info):
+        # type: (TestInfo) -> float
+        # price timeout is multiple of timeout of test case, None or 0 disables it
+        return self._price_timeout * test_info.timeout if self._price_timeout else None
+
+    async def _interpret_price_async(self, report, test_info):
+        # type: (TestReport, TestInfo) -> None
+        await asyncio.get_event_loop().run_in_executor(None, self._interpret_price, report, test_info)
+
+    @staticmethod
+    def _communicate(args, input_, timeout, pass_fds=()):
+        # type: (list, bytes, float, tuple) -> tuple
+        process = Popen(args, stdout=PIPE, stdin=PIPE, stderr=PIPE, pass_fds=pass_fds)
+        try:
+            out, err = process.communicate(input=input_, timeout=timeout)
         except (TimeoutError, TimeoutExpired):
             process.kill()
             raise
-        finally:
-            os.remove(code_temp)
-        out, err, exit_code = out.decode('raw_unicode_escape'), err.decode('raw_unicode_escape'), process.returncode
+        return out, err, process.returncode
 
+    @classmethod
+    async def _communicate_async(cls, args, input_, timeout, pass_fds=()):
+        # type: (list, bytes, float, tuple) -> tuple
+        loop = asyncio.get_event_loop()
+        started = loop.time()
+        process = await asyncio.create_subprocess_exec(
+            *args, stdout=PIPE, stdin=PIPE, stderr=PIPE, pass_fds=pass_fds
+        )
+        # timeout runs since start of process and communication is not cancelled by it, so process which exited
+        # in time, but its output was not collected yet by busy loop, is not killed
+        communication = asyncio.ensure_future(process.communicate(input=input_))
+        await asyncio.wait((communication,), timeout=max(started + timeout - loop.time(), 0))
+        if not communication.done() and not cls._process_exited(process):
+            try:
+                process.kill()
+            except ProcessLookupError:
+                # exited meanwhile
+                pass
+            else:
+                communication.cancel()
+                await process.wait()
+                raise TimeoutExpired(args, timeout)
+        out, err = await communication
+        return out, err, process.returncode
+
+    @staticmethod
+    def _process_exited(process):
+        # type: (asyncio.subprocess.Process) -> bool
+        # exit of process could be noticed by loop later, so it's checked without reaping of process
+        if process.returncode is not None or not hasattr(os, 'waitid'):
+            return process.returncode is not None
         try:
-            groot = err.splitlines()[-1]
-            report.groot_price = int(groot[groot.find('(') + 1:groot.find(')')])
-        except (IndexError, ValueError):
-            pass
-
-        # err has non-escaped characters
-        report.interpreter_stdout, report.interpreter_stderr, report.interpreter_exit_code = out, err, exit_code
+            return os.waitid(os.P_PID, process.pid, os.WEXITED | os.WNOHANG | os.WNOWAIT) is not None
+        except ChildProcessError:
+            # already reaped by child watcher
+            return True
 
-    def _interpret_price(self, code, test_info):
-        interpreter = Interpreter(code=code, state_kwargs=dict(
-            stdin=StringIO(test_info.stdin),
-        ))
-        state = interpreter.run()
-        return state
-
-    def _save_report(self, test_info, report):
-        # type: (TestInfo, TestReport) -> None
+    def _save_report(self, section, test_info, report):
+        # type: (str, TestInfo, TestReport) -> TestReport
         replace = lambda s: (s or '').replace('\n', '\n# ')
         with open(
                 path.join(
                     self._log_dir,
-                    self._actual_section,
+                    section,
                     '.'.join((test_info.name, 'IFJcode17'))
                 ),
                 'wb'
@@ -313,8 +667,8 @@ class TestRunner(object):
                 basename(test_info.section_dir),
                 test_info.name,
                 test_info.info,
-                ', '.join(test_info.extensions),
-                ', '.join(self._extensions),
+                ', '.join(sorted(test_info.extensions)),
+                ', '.join(sorted(self._extensions)),
                 'SUCCESS' if report.success else 'FAIL',
 
                 replace(report.compiler_stderr),
@@ -348,10 +702,15 @@ class TestRunner(object):
                 if line
             ) or '# ---')
             write('\n' * 2)
-        self._reports.append(report)
-        TestLogger._test_case_success = report.success
-        TestLogger._test_case_skipped = report.skipped
-        TestLogger.log_end_test_case()
+            if report.profiler and report.state:
+                write(_PROFILE.format(report.profiler.table().replace('\n', '\n# ')))
+        if report.profiler and report.state:
+            for extension in ('json', 'folded'):
+                report.profiler.save(
+                    path.join(self._log_dir, section, '.'.join((test_info.name, 'profile', extension)))
+                )
+        TestLogger.log_end_test_case(success=report.success, skipped=report.skipped)
+        return report
 
     @classmethod
     def check_platform(cls):
@@ -387,6 +746,11 @@ class TestRunner(object):
                 TestLogger.BOLD,
                 "WARNING: Running without interpreter - without STDOUT check."
             )
+        if self._jobs > (os.cpu_count() or 1):
+            TestLogger.log_warning(
+                'Count of jobs {} exceeds count of CPUs {}, timeouts of compiler and interpreter could expire '
+                'under load.'.format(self._jobs, os.cpu_count())
+            )
 
     def _try_load_extensions(self, extensions_file, compiler_path):
         if not extensions_file:
@@ -417,16 +781,22 @@ class TestRunner(object):
                 ''.join('# {}\n'.format(line) for line in (interpreter_stdout or '').splitlines()),
             )
 
-        diff = tuple(difflib.unified_diff(
-            stdout.splitlines(True),
-            interpreter_stdout.splitlines(True),
-            fromfile='expected',
-            tofile='actual',
-        ))
+        try:
+            diff, truncated = self._stdout_comparator.diff(stdout, interpreter_stdout)
+        except DiffBudgetExceeded:
+            rows, truncated = self._stdout_comparator.side_by_side(stdout, interpreter_stdout)
+            return _STDOUT_SIDE_BY_SIDE.format(
+                'EXPECTED', 'ACTUAL', ''.join((
+                    ''.join('# {}\n'.format(row) for row in rows),
+                    '# ... (truncated)\n' if truncated else '',
+                )),
+                width=StdoutComparator.SIDE_BY_SIDE_WIDTH
+            )
 
         return _STDOUT_DIFF.format(''.join((
             '# '.join('{}'.format(line) for line in diff[:3]),
             ''.join('\n# {}'.format(line) for line in diff[3:]),
+            '\n# ... (diff truncated)' if truncated else '',
         )))
 
 
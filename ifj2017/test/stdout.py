@@ -0,0 +1,147 @@
+# coding=utf-8
+import re
+
+from .diff import DifflibBackend
+
+_HUNK_RE = re.compile(r'^@@ -(\d+)(,\d+)? \+(\d+)(,\d+)? @@')
+
+
+# comparison of expected and actual stdout chunk by chunk, diff is computed only over bounded window of lines
+# around first divergence, so large outputs are never split to lines or diffed as whole,
+# diff backend raises DiffBudgetExceeded, when its budget is exceeded, side by side view is then used instead
+class StdoutComparator(object):
+    CHUNK_SIZE = 1 << 16
+    DEFAULT_CONTEXT = 3
+    DEFAULT_DIFF_BUDGET = 1.
+    WINDOW_LINES = 200  # lines after first divergence included in diff
+    SIDE_BY_SIDE_LINES = 50
+    SIDE_BY_SIDE_WIDTH = 40
+
+    def __init__(self, context=DEFAULT_CONTEXT, window_lines=WINDOW_LINES, backend=None):
+        # type: (int, int, object) -> None
+        assert context >= 0 and window_lines > 0
+        self._context = context
+        self._window_lines = window_lines
+        self._backend = backend or DifflibBackend()
+
+    @classmethod
+    def first_divergence(cls, expected, actual):
+        # type: (str, str) -> int
+        # index of first different character, -1 for same outputs
+        if expected == actual:
+            return -1
+        common_length = min(len(expected), len(actual))
+        for start in range(0, common_length, cls.CHUNK_SIZE):
+            end = min(start + cls.CHUNK_SIZE, common_length)
+            if expected[start:end] != actual[start:end]:
+                # bisect to first different character in chunk
+                while end - start > 1:
+                    middle = (start + end) // 2
+                    if expected[start:middle] == actual[start:middle]:
+                        start = middle
+                    else:
+                        end = middle
+                return start
+        return common_length if len(expected) != len(actual) else -1
+
+    def diff(self, expected, actual):
+        # type: (str, str) -> tuple
+        # unified diff lines with line numbers of whole outputs and flag of truncated diff
+        divergence = self.first_divergence(expected, actual)
+        if divergence < 0:
+            return (), False
+
+        if max(expected.count('\n'), actual.count('\n')) < self._window_lines:
+            # short outputs are diffed as whole
+            start, start_line = 0, 0
+            expected_end, expected_truncated = len(expected), False
+            actual_end, actual_truncated = len(actual), False
+        else:
+            start, start_line = self._window_start(expected, divergence)
+            expected_end, expected_truncated = self._window_end(expected, start)
+            actual_end, actual_truncated = self._window_end(actual, start)
+
+        diff = tuple(
+            self._shift_hunk(line, start_line)
+            for line in self._backend.diff(
+                expected[start:expected_end].splitlines(True),
+                actual[start:actual_end].splitlines(True),
+                n=self._context,
+                fromfile='expected',
+                tofile='actual',
+            )
+        )
+        return diff, expected_truncated or actual_truncated
+
+    def side_by_side(self, expected, actual):
+        # type: (str, str) -> tuple
+        # rows of lines from both outputs without any alignment and flag of truncated view
+        divergence = self.first_divergence(expected, actual)
+        if divergence < 0:
+            return (), False
+
+        start, start_line = self._window_start(expected, divergence)
+        expected_lines = self._split_lines(expected[start:])
+        actual_lines = self._split_lines(actual[start:])
+        count = max(len(expected_lines), len(actual_lines))
+        width = self.SIDE_BY_SIDE_WIDTH
+        rows = []
+        for i in range(min(count, self.SIDE_BY_SIDE_LINES)):
+            expected_line = expected_lines[i] if i < len(expected_lines) else None
+            actual_line = actual_lines[i] if i < len(actual_lines) else None
+            if expected_line == actual_line:
+                mark = ' '
+            elif actual_line is None:
+                mark = '<'
+            elif expected_line is None:
+                mark = '>'
+            else:
+                mark = '|'
+            rows.append('{:>6} {:<{width}.{width}} {} {:.{width}}'.format(
+                start_line + i + 1, expected_line or '', mark, actual_line or '', width=width
+            ))
+        return tuple(rows), count > self.SIDE_BY_SIDE_LINES
+
+    def _split_lines(self, output):
+        # type: (str) -> list
+        # last item keeps rest of output over limit
+        lines = output.split('\n', self.SIDE_BY_SIDE_LINES)
+        if not lines[-1]:
+            lines.pop()
+        return lines
+
+    def _window_start(self, expected, divergence):
+        # type: (str, int) -> tuple
+        # same prefix of both outputs, so window starts at same line and position in both
+        start = expected.rfind('\n', 0, divergence) + 1
+        start_line = expected.count('\n', 0, start)
+        for _ in range(min(self._context, start_line)):
+            start = expected.rfind('\n', 0, start - 1) + 1
+            start_line -= 1
+        return start, start_line
+
+    def _window_end(self, output, start):
+        # type: (str, int) -> tuple
+        end = start
+        for _ in range(self._context + self._window_lines):
+            end = output.find('\n', end) + 1
+            if not end:
+                return len(output), False
+        return end, end < len(output)
+
+    @staticmethod
+    def _shift_hunk(line, offset):
+        # type: (str, int) -> str
+        if not offset or not line.startswith('@@'):
+            return line
+        match = _HUNK_RE.match(line)
+        return ''.join((
+            '@@ -{}{} +{}{} @@'.format(
+                int(match.group(1)) + offset, match.group(2) or '',
+                int(match.group(3)) + offset, match.group(4) or '',
+            ),
+            line[match.end():]
+        ))
+
+
+__all__ = ['StdoutComparator']
@@ -0,0 +1,74 @@
+# coding=utf-8
+import threading
+
+from .base import PriceSummary
+
+
+# trust to price reported by GROOT of reference interpreter, first and every N-th trusted test case is verified by
+# python interpreter anyway, first mismatch revokes trust for rest of run, reference interpreter reports only total
+# price, so its breakdown to instruction and operand price is taken from verified test cases, if not reported
+class GrootTrust(object):
+    DEFAULT_SAMPLE_INTERVAL = 10
+
+    def __init__(self, sample_interval=DEFAULT_SAMPLE_INTERVAL):
+        # type: (int) -> None
+        assert sample_interval > 0
+        self._sample_interval = sample_interval
+        self._trusted = 0
+        self._revoked = False
+        # sums of prices of verified test cases
+        self._instruction_price = 0
+        self._operand_price = 0
+        self._verified = 0
+        self._lock = threading.Lock()
+
+    @property
+    def revoked(self):
+        # type: () -> bool
+        return self._revoked
+
+    def trusts(self, report):
+        # type: (TestReport) -> bool
+        # True in case of price from reference interpreter is used without python interpreter
+        if report.groot_price is None:
+            return False
+        with self._lock:
+            if self._revoked or not self._verified:
+                # breakdown is known only after first verified test case
+                return False
+            # first one is verified already
+            self._trusted += 1
+            return bool(self._trusted % self._sample_interval)
+
+    def price(self, report):
+        # type: (TestReport) -> PriceSummary
+        # price of trusted test case, breakdown is reported one or estimated by ratio of verified test cases
+        if report.groot_instruction_price is not None and report.groot_operand_price is not None:
+            return PriceSummary(report.groot_instruction_price, report.groot_operand_price)
+        with self._lock:
+            total = self._instruction_price + self._operand_price
+            instruction_price = report.groot_price * self._instruction_price // total if total else report.groot_price
+        return PriceSummary(instruction_price, report.groot_price - instruction_price)
+
+    def verify(self, report):
+        # type: (TestReport) -> bool
+        # compares price from python interpreter with reference one, mismatch revokes trust
+        if report.groot_price is None or not report.state:
+            return True
+        matches = report.state.price == report.groot_price and (
+            report.groot_instruction_price is None or report.groot_operand_price is None or
+            (report.groot_instruction_price, report.groot_operand_price) == (
+                report.state.instruction_price, report.state.operand_price
+            )
+        )
+        with self._lock:
+            if not matches:
+                self._revoked = True
+                return False
+            self._instruction_price += report.state.instruction_price
+            self._operand_price += report.state.operand_price
+            self._verified += 1
+        return True
+
+
+__all__ = ['GrootTrust']
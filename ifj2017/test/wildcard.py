@@ -0,0 +1,79 @@
+# coding=utf-8
+import re
+from fnmatch import translate
+
+from .logger import TestLogger
+
+_GLOB_CHARS = frozenset('*?[')
+
+
+def _is_glob(part):
+    # type: (str) -> bool
+    return not _GLOB_CHARS.isdisjoint(part)
+
+
+# filter of test cases by wildcards in form section or section/name, plain section is matched as substring of
+# section name and plain name as whole test name, both parts could be also glob patterns (07_*/0?),
+# wildcards are compiled once for each section, so filtering of test case does not depend on count of wildcards
+class WildcardMatcher(object):
+    def __init__(self, wildcards):
+        # type: (list) -> None
+        self._wildcards = self._parse_wildcards(wildcards)
+        self._sections = {}  # section -> (all names allowed, set of names, compiled name patterns)
+
+    @staticmethod
+    def _parse_wildcards(wildcards):
+        parsed = set()
+        for wildcard in filter(None, wildcards):
+            parts = tuple(filter(None, wildcard.split('/')))
+            parts_count = len(parts)
+            if parts_count == 1:
+                section, name = parts[0], None
+            elif parts_count == 2:
+                section, name = parts
+            else:
+                TestLogger.log_warning('Invalid wildcard {}, skipping.'.format(wildcard))
+                continue
+            # plain section stays as string for substring match
+            parsed.add((re.compile(translate(section)).match if _is_glob(section) else section, name))
+        return tuple(parsed)
+
+    def _compile_section(self, section):
+        # type: (str) -> tuple
+        all_names = False
+        names = set()
+        patterns = []
+        for section_wc, name_wc in self._wildcards:
+            if not self._match_section(section_wc, section):
+                continue
+            if name_wc is None:
+                all_names = True
+            elif _is_glob(name_wc):
+                patterns.append('(?:{})'.format(translate(name_wc)))
+            else:
+                names.add(name_wc)
+        matched = all_names or names or patterns
+        return matched, all_names, names, re.compile('|'.join(patterns)).match if patterns else None
+
+    @staticmethod
+    def _match_section(section_wc, section):
+        if isinstance(section_wc, str):
+            return section_wc in section
+        return section_wc(section) is not None
+
+    def allows(self, section, name=None):
+        # type: (str, str) -> bool
+        if not self._wildcards:
+            return True
+
+        compiled = self._sections.get(section)
+        if compiled is None:
+            compiled = self._sections[section] = self._compile_section(section)
+        matched, all_names, names, pattern = compiled
+
+        if name is None:
+            return bool(matched)
+        return all_names or name in names or (pattern is not None and pattern(name) is not None)
+
+
+__all__ = ['WildcardMatcher']
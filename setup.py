@@ -3,9 +3,10 @@
 
 import sys
 from distutils import core
-from os.path import abspath, dirname, join
+from os.path import abspath, dirname, isdir, join
 
 from setuptools import find_packages
+from setuptools.command.build_py import build_py
 
 import ifj2017
 
@@ -31,6 +32,21 @@ except(IOError, ImportError) as e:
         long_description = ''
 
 
+class BuildPyWithTestsBundle(build_py):
+    # packs bundled tests to one file for fast loading by test runner
+    def run(self):
+        build_py.run(self)
+        if self.dry_run:
+            return
+        from ifj2017.test.bundle import TestBundle
+        tests_dir = join(self.build_lib, 'ifj2017', 'tests')
+        # bundle is authoritative for installed tests, rebuild after editing them
+        TestBundle.build(
+            tests_dir if isdir(tests_dir) else join(base_path, 'ifj2017', 'tests'),
+            TestBundle.bundle_file(tests_dir)
+        )
+
+
 def setup():
     core.setup(
         name='IFJcode17-toolkit',
@@ -81,6 +97,9 @@ def setup():
         ],
         include_package_data=True,
         zip_safe=False,
+        cmdclass={
+            'build_py': BuildPyWithTestsBundle,
+        },
     )
 
 
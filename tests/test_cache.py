@@ -0,0 +1,53 @@
+# coding=utf-8
+import os.path as path
+import shutil
+import tempfile
+import unittest
+
+from ifj2017.interpreter.cache import hash_sources
+# modules only, pytest would collect their Test* classes
+from ifj2017.test import base
+from ifj2017.test.cache import ResultCache
+
+
+class ResultCacheSourcesTest(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.mkdtemp()
+        self._source = path.join(self._dir, 'prices.py')
+        self._write_source('OPERAND_VARIABLE = 1\n')
+
+        class Cache(ResultCache):
+            SOURCES = (self._dir,)
+
+        self._cache = Cache(path.join(self._dir, 'cache'), binaries=(), settings=())
+        self._test_info = base.TestInfo('001', 'print 1', '', ' 1', 0, 0, '', self._dir, set(), 1.)
+
+    def tearDown(self):
+        hash_sources.cache_clear()
+        shutil.rmtree(self._dir)
+
+    def _write_source(self, content):
+        with open(self._source, 'w') as f:
+            f.write(content)
+        hash_sources.cache_clear()
+
+    def test_result_is_cached(self):
+        report = base.TestReport()
+        report.state = base.PriceSummary(10, 5)
+        self._cache.store(report, self._test_info)
+
+        cached = base.TestReport()
+        self.assertTrue(self._cache.load(cached, self._test_info))
+        self.assertEqual(cached.state, base.PriceSummary(10, 5))
+
+    def test_changed_sources_invalidate_result(self):
+        report = base.TestReport()
+        report.state = base.PriceSummary(10, 5)
+        self._cache.store(report, self._test_info)
+
+        self._write_source('OPERAND_VARIABLE = 2\n')
+        self.assertFalse(self._cache.load(base.TestReport(), self._test_info))
+
+
+if __name__ == '__main__':
+    unittest.main()
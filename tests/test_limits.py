@@ -0,0 +1,75 @@
+# coding=utf-8
+import unittest
+from io import StringIO
+
+from ifj2017.interpreter.exceptions import InstructionLimitError, TimeLimitError
+from ifj2017.interpreter.interpreter import Interpreter
+
+THREE_WRITES = """\
+.IFJcode17
+WRITE int@1
+WRITE int@2
+WRITE int@3
+"""
+
+ENDLESS_LOOP = """\
+.IFJcode17
+DEFVAR GF@i
+MOVE GF@i int@0
+LABEL loop
+ADD GF@i GF@i int@1
+JUMP loop
+"""
+
+
+class LimitsTest(unittest.TestCase):
+    def _run(self, code, engine, **limits):
+        stdout = StringIO()
+        interpreter = Interpreter(code, state_kwargs=dict(stdout=stdout), engine=engine)
+        return interpreter, stdout, lambda: interpreter.run(**limits)
+
+    def test_instruction_limit_stops_before_next_instruction(self):
+        for engine in Interpreter.ENGINES:
+            with self.subTest(engine=engine):
+                _, stdout, run = self._run(THREE_WRITES, engine, instruction_limit=2)
+                with self.assertRaises(InstructionLimitError) as context:
+                    run()
+                self.assertEqual(stdout.getvalue(), ' 1 2')
+                self.assertEqual(context.exception.state.executed_instructions, 2)
+
+    def test_program_within_instruction_limit(self):
+        for engine in Interpreter.ENGINES:
+            with self.subTest(engine=engine):
+                _, stdout, run = self._run(THREE_WRITES, engine, instruction_limit=3)
+                self.assertEqual(run().executed_instructions, 3)
+                self.assertEqual(stdout.getvalue(), ' 1 2 3')
+
+    def test_instruction_limit_in_loop(self):
+        for engine in Interpreter.ENGINES:
+            with self.subTest(engine=engine):
+                _, _, run = self._run(ENDLESS_LOOP, engine, instruction_limit=1000)
+                with self.assertRaises(InstructionLimitError) as context:
+                    run()
+                self.assertEqual(context.exception.state.executed_instructions, 1000)
+
+    def test_time_limit(self):
+        for engine in Interpreter.ENGINES:
+            with self.subTest(engine=engine):
+                _, _, run = self._run(ENDLESS_LOOP, engine, time_limit=.1)
+                with self.assertRaises(TimeLimitError):
+                    run()
+
+    def test_instruction_limit_with_hooks(self):
+        executed = []
+        interpreter, stdout, run = self._run(THREE_WRITES, Interpreter.ENGINE_COMPILED, instruction_limit=2)
+        interpreter.add_hook(Interpreter.HOOK_PRE_INSTRUCTION, lambda state, program_counter: executed.append(
+            program_counter
+        ))
+        with self.assertRaises(InstructionLimitError):
+            run()
+        self.assertEqual(executed, [0, 1])
+        self.assertEqual(stdout.getvalue(), ' 1 2')
+
+
+if __name__ == '__main__':
+    unittest.main()
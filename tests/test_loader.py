@@ -0,0 +1,74 @@
+# coding=utf-8
+import os
+import os.path as path
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+# modules only, pytest would collect their Test* classes
+from ifj2017.test import bundle, loader
+
+
+class BundledLoaderTest(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.mkdtemp()
+        self._tests_dir = path.join(self._dir, 'ifj2017', 'tests')
+        section_dir = path.join(self._tests_dir, '01_section')
+        os.makedirs(section_dir)
+        self._code_file = path.join(section_dir, '001.code')
+        for file, content in (('001.code', "' packed\nprint 1\n"), ('001.stdout', '1')):
+            self._write(path.join(section_dir, file), content)
+        bundle.TestBundle.build(self._tests_dir, bundle.TestBundle.bundle_file(self._tests_dir))
+
+    def tearDown(self):
+        shutil.rmtree(self._dir)
+
+    @staticmethod
+    def _write(file, content):
+        with open(file, 'w') as f:
+            f.write(content)
+
+    def _load(self, use_bundle=True):
+        test_loader = loader.TestLoader(self._tests_dir, 1., [], use_bundle=use_bundle)
+        section_dir, = test_loader.load_section_dirs()
+        test_info, = test_loader.load_tests(section_dir)
+        return test_info
+
+    def _checkout(self):
+        os.mkdir(path.join(self._dir, '.git'))
+        self._write(path.join(self._dir, 'setup.py'), '')
+
+    def test_installed_tests_are_read_from_bundle(self):
+        with mock.patch.object(loader.TestLoader, 'load_file') as load_file, \
+                mock.patch.object(loader.os, 'listdir') as listdir:
+            test_info = self._load()
+        self.assertFalse(load_file.called)
+        self.assertFalse(listdir.called)
+        self.assertEqual(test_info.code, "' packed\nprint 1\n")
+        self.assertEqual(test_info.stdout, '1')
+
+    def test_installed_tests_with_other_times_of_modification(self):
+        # installers do not preserve times of modification
+        os.utime(self._code_file, ns=(0, 0))
+        with mock.patch.object(loader.TestLoader, 'load_file') as load_file:
+            self._load()
+        self.assertFalse(load_file.called)
+
+    def test_edited_test_in_checkout_is_read_from_disk(self):
+        self._checkout()
+        self._write(self._code_file, "' edited\nprint 2\n")
+        self.assertEqual(self._load().code, "' edited\nprint 2\n")
+
+    def test_added_test_file_in_checkout_is_read_from_disk(self):
+        self._checkout()
+        self._write(path.join(path.dirname(self._code_file), '001.stdin'), 'input')
+        self.assertEqual(self._load().stdin, 'input')
+
+    def test_edited_test_without_bundle(self):
+        self._write(self._code_file, "' edited\nprint 2\n")
+        self.assertEqual(self._load(use_bundle=False).code, "' edited\nprint 2\n")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,34 @@
+# coding=utf-8
+import os
+import select
+import unittest
+
+from ifj2017.interpreter.interpreter import Interpreter
+from ifj2017.test.price_pool import PricePool
+
+
+class PricePoolTest(unittest.TestCase):
+    def setUp(self):
+        self._pool = PricePool(1, engine=Interpreter.ENGINE_COMPILED)
+
+    def tearDown(self):
+        self._pool.close()
+
+    def test_price(self):
+        self.assertEqual(self._pool.price('.IFJcode17\nWRITE int@1\n', ''), (4, 1))
+
+    def test_workers_do_not_inherit_descriptors(self):
+        # pipe of subprocess started by another thread, workers started meanwhile must not hold its end
+        read, write = os.pipe()
+        try:
+            self._pool.price('.IFJcode17\n', '')
+            os.close(write)
+            readable, _, _ = select.select((read,), (), (), 5.)
+            self.assertEqual(readable, [read])
+            self.assertEqual(os.read(read, 1), b'')
+        finally:
+            os.close(read)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+# coding=utf-8
+import unittest
+
+from ifj2017.interpreter.interpreter import Interpreter
+from ifj2017.interpreter.profiler import Profiler
+
+# f calls g and itself n times
+RECURSION = """\
+.IFJcode17
+DEFVAR GF@n
+MOVE GF@n int@{}
+CALL f
+JUMP end
+LABEL f
+JUMPIFEQ ret GF@n int@0
+SUB GF@n GF@n int@1
+CALL g
+CALL f
+LABEL ret
+RETURN
+LABEL g
+RETURN
+LABEL end
+"""
+
+
+class ProfilerTest(unittest.TestCase):
+    @staticmethod
+    def _profile(depth):
+        # type: (int) -> tuple
+        interpreter = Interpreter(RECURSION.format(depth), engine=Interpreter.ENGINE_COMPILED)
+        profiler = Profiler().attach(interpreter)
+        return profiler, interpreter.run().price
+
+    def test_stacks(self):
+        profiler, price = self._profile(2)
+        stacks = [(tuple(stack['stack']), stack['executed']) for stack in profiler.to_json()['stacks']]
+        self.assertEqual(stacks, [
+            (('(main)',), 5),
+            (('(main)', 'f'), 7),
+            (('(main)', 'f', 'f'), 7),
+            (('(main)', 'f', 'f', 'f'), 4),
+            (('(main)', 'f', 'f', 'g'), 2),
+            (('(main)', 'f', 'g'), 2),
+        ])
+        self.assertEqual(sum(stack['price'] for stack in profiler.to_json()['stacks']), price)
+        self.assertEqual(
+            [line.rsplit(' ', 1)[0] for line in profiler.collapsed()],
+            ['(main)', '(main);f', '(main);f;f', '(main);f;f;f', '(main);f;f;g', '(main);f;g']
+        )
+
+    def test_recursive_function_is_included_once(self):
+        profiler, price = self._profile(2)
+        functions = {row[0]: row for row in profiler.by_function()}
+        self.assertEqual(functions['(main)'][4], price)
+        self.assertEqual(functions['f'][1], 3)
+        self.assertEqual(functions['f'][4], price - functions['(main)'][3])
+        self.assertEqual(functions['g'][3], functions['g'][4])
+
+    def test_deep_recursion(self):
+        depth = 5000
+        profiler, price = self._profile(depth)
+        functions = {row[0]: row for row in profiler.by_function()}
+        self.assertEqual(functions['f'][1], depth + 1)
+        self.assertEqual(functions['(main)'][4], price)
+        self.assertEqual(len(profiler.collapsed()), 2 * depth + 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
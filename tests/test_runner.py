@@ -0,0 +1,245 @@
+# coding=utf-8
+import asyncio
+import os
+import os.path as path
+import platform
+import shutil
+import stat
+import tempfile
+import time
+import unittest
+from argparse import Namespace
+from unittest import mock
+
+from ifj2017.interpreter.interpreter import Interpreter
+# modules only, pytest would collect their Test* classes
+from ifj2017.test import base, logger, runner
+
+# compiled code is given as code of test case, so compiler only copies it
+COMPILER = """\
+#!/bin/sh
+exec cat
+"""
+
+LOOP = """\
+.IFJcode17
+DEFVAR GF@i
+MOVE GF@i int@0
+LABEL loop
+ADD GF@i GF@i int@1
+WRITE GF@i
+JUMPIFNEQ loop GF@i int@3
+"""
+
+
+@unittest.skipUnless(platform.system() == 'Linux', 'reference interpreter is run only on Linux')
+class RunnerEngineTest(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.mkdtemp()
+        self._compiler = path.join(self._dir, 'compiler')
+        with open(self._compiler, 'w') as f:
+            f.write(COMPILER)
+        os.chmod(self._compiler, stat.S_IRWXU)
+        section_dir = path.join(self._dir, 'tests', '01_loop')
+        os.makedirs(section_dir)
+        for file, content in (('001.code', LOOP), ('001.stdout', ' 1 2 3')):
+            with open(path.join(section_dir, file), 'w') as f:
+                f.write(content)
+
+    def tearDown(self):
+        shutil.rmtree(self._dir)
+
+    def _runner(self, engine=Interpreter.ENGINE_COMPILED, jobs=1, pipeline=False, trust_groot=False, price_timeout=10.):
+        # type: (str, int, bool, bool, float) -> runner.TestRunner
+        return runner.TestRunner(Namespace(
+            compiler=self._compiler,
+            tests=[],
+            interpreter=runner.TestRunner.INTERPRETERS.get(platform.system()),
+            extensions_file=None,
+            verbose=False,
+            no_interpreter=False,
+            tests_dir=path.join(self._dir, 'tests'),
+            no_bundle=True,
+            log_dir=path.join(self._dir, 'log'),
+            token_file=None,
+            benchmark_url_target='http://localhost',
+            command_timeout=5.,
+            jobs=jobs,
+            pipeline=pipeline,
+            code_files='auto',
+            no_colors=True,
+            engine=engine,
+            price_timeout=price_timeout,
+            price_instruction_limit=None,
+            price_workers=0,
+            price_memory_limit=2048,
+            trust_groot=trust_groot,
+            trust_groot_sample=10,
+            profile=False,
+            cache_dir=path.join(self._dir, 'cache'),
+            no_cache=True,
+            no_stdout_diff=False,
+            stdout_diff_context=3,
+            stdout_diff_backend='difflib',
+            stdout_diff_budget=1.,
+        ))
+
+    def test_price_is_computed_by_selected_engine(self):
+        # price timeout is always set, so limits have to be checked by selected engine itself
+        for engine, method in (
+                (Interpreter.ENGINE_COMPILED, '_run_compiled'),
+                (Interpreter.ENGINE_BLOCKS, '_run_blocks'),
+                (Interpreter.ENGINE_TRANSPILED, '_run_transpiled'),
+        ):
+            with self.subTest(engine=engine):
+                test_runner = self._runner(engine)
+                original = getattr(Interpreter, method)
+                with mock.patch.object(Interpreter, method, autospec=True, side_effect=original) as run, \
+                        mock.patch.object(Interpreter, '_run_instrumented') as instrumented, \
+                        mock.patch.object(Interpreter, '_run_standard') as standard:
+                    logger.TestLogger.capture_output()
+                    try:
+                        test_runner._run_tests()
+                    finally:
+                        logger.TestLogger.release_output()
+                self.assertTrue(run.called)
+                self.assertFalse(instrumented.called)
+                # transpiled engine falls back to standard one for unsupported programs
+                self.assertFalse(standard.called)
+                report, = test_runner._reports
+                self.assertTrue(report.success)
+                self.assertEqual(report.state.price, report.groot_price)
+
+    def test_trusted_price_of_reference_interpreter(self):
+        for name in ('002', '003'):
+            for extension, content in (('code', LOOP), ('stdout', ' 1 2 3')):
+                with open(path.join(self._dir, 'tests', '01_loop', '.'.join((name, extension))), 'w') as f:
+                    f.write(content)
+        test_runner = self._runner(trust_groot=True)
+        original = runner.TestRunner._interpret_price_python
+        with mock.patch.object(
+                runner.TestRunner, '_interpret_price_python', autospec=True, side_effect=original
+        ) as interpret_price:
+            logger.TestLogger.capture_output()
+            try:
+                test_runner._run_tests()
+            finally:
+                logger.TestLogger.release_output()
+        # only first one is verified, ic17int reports only total price
+        self.assertEqual(interpret_price.call_count, 1)
+        verified, *trusted = test_runner._reports
+        self.assertIsNone(verified.groot_instruction_price)
+        for report in trusted:
+            self.assertTrue(report.success)
+            self.assertEqual(
+                (report.state.instruction_price, report.state.operand_price),
+                (verified.state.instruction_price, verified.state.operand_price)
+            )
+
+    def test_price_timeout_is_multiple_of_test_timeout(self):
+        # timeout of test case defaults to command timeout
+        for price_timeout, time_limit in ((2., 10.), (0., None), (None, None)):
+            with self.subTest(price_timeout=price_timeout):
+                test_runner = self._runner(price_timeout=price_timeout)
+                original = Interpreter.run
+                with mock.patch.object(Interpreter, 'run', autospec=True, side_effect=original) as run:
+                    logger.TestLogger.capture_output()
+                    try:
+                        test_runner._run_tests()
+                    finally:
+                        logger.TestLogger.release_output()
+                self.assertEqual(run.call_args[1]['time_limit'], time_limit)
+                report, = test_runner._reports
+                self.assertTrue(report.success)
+
+    def test_extensions_in_log_are_sorted(self):
+        test_runner = self._runner()
+        test_info = base.TestInfo('002', '', '', '', 0, 0, '', self._dir, {'UNARY', 'BASE', 'SCOPE', 'FUNEXP'}, 1.)
+        os.mkdir(path.join(self._dir, 'log', '01_loop'))
+        logger.TestLogger.capture_output()
+        try:
+            test_runner._save_report('01_loop', test_info, test_runner._begin_test(test_info))
+        finally:
+            logger.TestLogger.release_output()
+        with open(path.join(self._dir, 'log', '01_loop', '002.IFJcode17')) as f:
+            self.assertIn('# REQUIRED EXTENSIONS: BASE, FUNEXP, SCOPE, UNARY\n', f.read())
+
+    def test_pipeline(self):
+        reports = []
+        for settings in (dict(), dict(jobs=2, pipeline=True)):
+            test_runner = self._runner(**settings)
+            logger.TestLogger.capture_output()
+            try:
+                test_runner._run_tests()
+            finally:
+                logger.TestLogger.release_output()
+            report, = test_runner._reports
+            reports.append((report.success, report.interpreter_stdout, report.state.price, report.groot_price))
+        self.assertEqual(reports[0], reports[1])
+        self.assertEqual(reports[1][:2], (True, ' 1 2 3'))
+
+
+@unittest.skipUnless(os.name == 'posix', 'shell is used as subprocess')
+class CommunicateAsyncTest(unittest.TestCase):
+    def setUp(self):
+        self._loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        self._loop.close()
+
+    def _communicate(self, command, timeout, busy=0.):
+        # type: (str, float, float) -> tuple
+        async def communicate():
+            communication = self._loop.create_task(runner.TestRunner._communicate_async(
+                ['sh', '-c', command], b'', timeout
+            ))
+            await asyncio.sleep(.01)
+            # loop is blocked e.g. by writing of large log
+            time.sleep(busy)
+            return await communication
+
+        return self._loop.run_until_complete(communicate())
+
+    def test_process_exited_while_loop_was_busy(self):
+        self.assertEqual(self._communicate('sleep .05; echo done', timeout=.2, busy=.5), (b'done\n', b'', 0))
+
+    def test_timeout(self):
+        with self.assertRaises(runner.TimeoutExpired):
+            self._communicate('exec sleep 5', timeout=.2)
+
+
+class GrootPriceTest(unittest.TestCase):
+    @staticmethod
+    def _report(err):
+        # type: (str) -> base.TestReport
+        report = base.TestReport()
+        runner.TestRunner._set_interpreted(report, b'', bytes(err, encoding='utf-8'), 0)
+        return report
+
+    def test_price(self):
+        report = self._report('Executing instruction: IGROOT at line: 12 with following arguments:\n'
+                              'I am Groot at 12 (345).\n')
+        self.assertEqual(report.groot_price, 345)
+        self.assertIsNone(report.groot_instruction_price)
+        self.assertIsNone(report.groot_operand_price)
+
+    def test_price_with_breakdown(self):
+        report = self._report('I am Groot at 12 (345 = 300 + 45).\n')
+        self.assertEqual(
+            (report.groot_price, report.groot_instruction_price, report.groot_operand_price), (345, 300, 45)
+        )
+
+    def test_breakdown_not_matching_price(self):
+        report = self._report('I am Groot at 12 (345 = 300 + 40).\n')
+        self.assertEqual(report.groot_price, 345)
+        self.assertIsNone(report.groot_instruction_price)
+        self.assertIsNone(report.groot_operand_price)
+
+    def test_without_price(self):
+        for err in ('', 'Error at line 12 (5).\n', 'I am Groot at 12 (345).\nError (3+4)\n'):
+            with self.subTest(err=err):
+                self.assertIsNone(self._report(err).groot_price)
+
+
+if __name__ == '__main__':
+    unittest.main()
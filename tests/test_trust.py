@@ -0,0 +1,56 @@
+# coding=utf-8
+import unittest
+
+# modules only, pytest would collect their Test* classes
+from ifj2017.test import base
+from ifj2017.test.trust import GrootTrust
+
+
+class GrootTrustTest(unittest.TestCase):
+    @staticmethod
+    def _report(groot_price, state=None, breakdown=(None, None)):
+        # type: (int, tuple, tuple) -> base.TestReport
+        report = base.TestReport()
+        report.groot_price = groot_price
+        report.groot_instruction_price, report.groot_operand_price = breakdown
+        report.state = base.PriceSummary(*state) if state else None
+        return report
+
+    def test_first_price_is_verified(self):
+        trust = GrootTrust(sample_interval=2)
+        self.assertFalse(trust.trusts(self._report(10)))
+        self.assertTrue(trust.verify(self._report(10, state=(6, 4))))
+        self.assertTrue(trust.trusts(self._report(20)))
+
+    def test_every_nth_price_is_verified(self):
+        trust = GrootTrust(sample_interval=2)
+        trust.verify(self._report(10, state=(6, 4)))
+        self.assertEqual([trust.trusts(self._report(10)) for _ in range(4)], [True, False, True, False])
+
+    def test_breakdown_of_trusted_price(self):
+        trust = GrootTrust()
+        trust.verify(self._report(10, state=(6, 4)))
+        trust.verify(self._report(30, state=(24, 6)))
+        # ratio of verified ones is 30:10
+        self.assertEqual(trust.price(self._report(101)), base.PriceSummary(75, 26))
+        self.assertEqual(trust.price(self._report(101, breakdown=(100, 1))), base.PriceSummary(100, 1))
+
+    def test_mismatch_revokes_trust(self):
+        trust = GrootTrust(sample_interval=2)
+        trust.verify(self._report(10, state=(6, 4)))
+        self.assertFalse(trust.verify(self._report(11, state=(6, 4))))
+        self.assertTrue(trust.revoked)
+        self.assertFalse(trust.trusts(self._report(10)))
+
+    def test_mismatch_of_reported_breakdown(self):
+        trust = GrootTrust()
+        self.assertFalse(trust.verify(self._report(10, state=(6, 4), breakdown=(5, 5))))
+
+    def test_price_without_groot(self):
+        trust = GrootTrust()
+        trust.verify(self._report(10, state=(6, 4)))
+        self.assertFalse(trust.trusts(self._report(None)))
+
+
+if __name__ == '__main__':
+    unittest.main()
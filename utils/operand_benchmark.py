@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# coding=utf-8
+import re
+import sys
+from glob import iglob
+from os.path import abspath, dirname, join
+from timeit import timeit
+
+sys.path.insert(0, abspath(join(dirname(__file__), '..')))
+
+from ifj2017 import __PROJECT_ROOT__
+from ifj2017.interpreter.exceptions import InvalidCodeException
+from ifj2017.interpreter.operand import Operand, TypeOperand, float as float_constant, parse_operand
+
+TESTS_DIR = sys.argv[1] if len(sys.argv) > 1 else join(__PROJECT_ROOT__, 'ifj2017/tests')
+REPEAT = 5
+
+# previous implementation with sequence of regexes and escape callback, used as reference
+_IDENTIFIER_RE_PART = r'[a-z_\-$&%*][\w_\-$&%*]*'
+CONSTANT_RE = re.compile(r'^(?P<type>bool|int|string|float)@(?P<value>.*)$', re.IGNORECASE)
+VARIABLE_RE = re.compile(r'^(?P<frame>[GLT]F)@(?P<name>{})$'.format(_IDENTIFIER_RE_PART), re.IGNORECASE)
+TYPE_RE = re.compile(r'^(?P<type>int|string|bool|float)$', re.IGNORECASE)
+LABEL_RE = re.compile(r'^{}$'.format(_IDENTIFIER_RE_PART), re.IGNORECASE)
+ESCAPE_RE = re.compile(r'\\([0-9]{3})')
+
+
+def legacy_operand(value):
+    constant_match = CONSTANT_RE.match(value)
+    if constant_match:
+        type_, value = constant_match.groups()
+        type_ = type_.lower().strip()
+        decoded = None
+        try:
+            decoded = Operand.CONSTANT_MAPPING.get(type_)(value)
+            if type_ == 'bool':
+                decoded = Operand.BOOL_LITERAL_MAPPING.get(value.lower())
+            elif type_ == 'string':
+                decoded = ESCAPE_RE.sub(lambda m: chr(int(m.group(1))), decoded)
+        except ValueError:
+            pass
+        if decoded is None:
+            raise InvalidCodeException(InvalidCodeException.INVALID_OPERAND)
+        return int(TypeOperand.CONSTANT), decoded, None
+    variable_match = VARIABLE_RE.match(value)
+    if variable_match:
+        return (int(TypeOperand.VARIABLE),) + variable_match.groups()
+    type_match = TYPE_RE.match(value)
+    if type_match:
+        return int(TypeOperand.DATA_TYPE), type_match.group(1).lower(), None
+    if LABEL_RE.match(value):
+        return int(TypeOperand.LABEL), value, None
+    raise InvalidCodeException(InvalidCodeException.INVALID_OPERAND)
+
+
+def _escape(string):
+    # IFJcode17 string constant as emitted by compiler
+    return ''.join(
+        '\\{:03}'.format(ord(char)) if ord(char) <= 32 or char in '#\\' else char
+        for char in string
+    )
+
+
+def load_operands():
+    # tests are in IFJ17, so operands are derived from their tokens as compiler would emit them
+    operands = []
+    for file in sorted(iglob(join(TESTS_DIR, '**', '*.*'), recursive=True)):
+        with open(file, 'rb') as f:
+            content = f.read().decode('utf-8', 'replace')
+        for string in re.findall(r'!"((?:[^"\\]|\\.)*)"', content):
+            operands.append('string@{}'.format(_escape(string)))
+        for token in content.split():
+            operands.append(token)
+            if re.match(r'^\d+$', token):
+                operands.extend(('int@{}'.format(token), 'float@{}'.format(float_constant(token).hex())))
+            elif LABEL_RE.match(token):
+                operands.extend(('LF@{}'.format(token), 'GF@{}'.format(token), 'TF@{}'.format(token)))
+    return operands
+
+
+def _parse_all(parse, operands):
+    results = []
+    for operand in operands:
+        try:
+            results.append(parse(operand))
+        except InvalidCodeException:
+            results.append(None)
+    return results
+
+
+def main():
+    operands = load_operands()
+    legacy = _parse_all(legacy_operand, operands)
+    current = _parse_all(parse_operand, operands)
+    mismatches = [
+        (operand, expected, given)
+        for operand, expected, given in zip(operands, legacy, current)
+        if expected != given
+    ]
+    for operand, expected, given in mismatches[:10]:
+        print('Mismatch for {!r}: expected {!r}, given {!r}.'.format(operand, expected, given), file=sys.stderr)
+
+    legacy_time = min(timeit(lambda: _parse_all(legacy_operand, operands), number=1) for _ in range(REPEAT))
+    current_time = min(timeit(lambda: _parse_all(parse_operand, operands), number=1) for _ in range(REPEAT))
+    print('{} operands ({} constants, {} invalid) from {}'.format(
+        len(operands),
+        sum(1 for result in legacy if result and result[0] == TypeOperand.CONSTANT),
+        sum(1 for result in legacy if result is None),
+        TESTS_DIR
+    ))
+    print('legacy:  {:.4f}s'.format(legacy_time))
+    print('current: {:.4f}s ({:.2f}x)'.format(current_time, legacy_time / current_time))
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# coding=utf-8
+import os
+import platform
+import shutil
+import stat
+import sys
+import tempfile
+from argparse import Namespace
+from os.path import abspath, dirname, join
+from time import perf_counter
+
+sys.path.insert(0, abspath(join(dirname(__file__), '..')))
+
+from ifj2017.interpreter.interpreter import Interpreter
+from ifj2017.test.runner import TestRunner
+
+JOBS = int(sys.argv[1]) if len(sys.argv) > 1 else max(os.cpu_count() or 1, 2)
+SECTIONS = 4
+TESTS = 15  # per section
+REPEAT = 3
+
+# compiled code is given as code of test case, so compiler only copies it
+COMPILER = """\
+#!/bin/sh
+exec cat
+"""
+
+LOOP = """\
+.IFJcode17
+DEFVAR GF@i
+DEFVAR GF@sum
+MOVE GF@i int@0
+MOVE GF@sum int@0
+LABEL loop
+ADD GF@i GF@i int@1
+ADD GF@sum GF@sum GF@i
+JUMPIFNEQ loop GF@i int@{}
+WRITE GF@sum
+"""
+
+MODES = (
+    ('serial', dict()),
+    ('jobs', dict(jobs=JOBS)),
+    ('jobs + price workers', dict(jobs=JOBS, price_workers=JOBS)),
+    ('pipeline', dict(jobs=JOBS, pipeline=True)),
+    ('pipeline + price workers', dict(jobs=JOBS, pipeline=True, price_workers=JOBS)),
+)
+
+
+def _corpus(directory):
+    # type: (str) -> tuple
+    compiler = join(directory, 'compiler')
+    with open(compiler, 'w') as f:
+        f.write(COMPILER)
+    os.chmod(compiler, stat.S_IRWXU)
+    tests_dir = join(directory, 'tests')
+    for section in range(1, SECTIONS + 1):
+        section_dir = join(tests_dir, '{:02}_section'.format(section))
+        os.makedirs(section_dir)
+        for test in range(1, TESTS + 1):
+            iterations = 20 * (section * TESTS + test)
+            with open(join(section_dir, '{:03}.code'.format(test)), 'w') as f:
+                f.write(LOOP.format(iterations))
+            with open(join(section_dir, '{:03}.stdout'.format(test)), 'w') as f:
+                f.write(' {}'.format(iterations * (iterations + 1) // 2))
+    return compiler, tests_dir
+
+
+def _runner(directory, compiler, tests_dir, jobs=1, pipeline=False, price_workers=0):
+    return TestRunner(Namespace(
+        compiler=compiler,
+        tests=[],
+        interpreter=TestRunner.INTERPRETERS.get(platform.system()),
+        extensions_file=None,
+        verbose=False,
+        no_interpreter=False,
+        tests_dir=tests_dir,
+        no_bundle=True,
+        log_dir=join(directory, 'log'),
+        token_file=None,
+        benchmark_url_target='http://localhost',
+        # wall time of subprocesses grows with more jobs than CPUs, expired timeouts would only shorten the run
+        command_timeout=5.,
+        jobs=jobs,
+        pipeline=pipeline,
+        code_files='auto',
+        no_colors=True,
+        engine=Interpreter.ENGINE_COMPILED,
+        price_timeout=TestRunner.DEFAULT_PRICE_TIMEOUT,
+        price_instruction_limit=None,
+        price_workers=price_workers,
+        price_memory_limit=2048,
+        trust_groot=False,
+        trust_groot_sample=10,
+        profile=False,
+        cache_dir=join(directory, 'cache'),
+        no_cache=True,
+        no_stdout_diff=False,
+        stdout_diff_context=3,
+        stdout_diff_backend='difflib',
+        stdout_diff_budget=1.,
+    ))
+
+
+def _run(runner):
+    # type: (TestRunner) -> tuple
+    # runner logs to stderr, which is redirected to file to compare output of runs
+    with tempfile.TemporaryFile() as output:
+        sys.stderr.flush()
+        stderr = os.dup(2)
+        os.dup2(output.fileno(), 2)
+        start = perf_counter()
+        try:
+            runner._run_tests()
+        finally:
+            elapsed = perf_counter() - start
+            sys.stderr.flush()
+            os.dup2(stderr, 2)
+            os.close(stderr)
+            if runner._price_pool:
+                runner._price_pool.close()
+        output.seek(0)
+        return elapsed, output.read()
+
+
+def measure(directory, compiler, tests_dir, settings):
+    # type: (str, str, str, dict) -> tuple
+    # returns best time of whole run of tests with output logged by runner
+    best, output = None, None
+    for _ in range(REPEAT):
+        elapsed, output = _run(_runner(directory, compiler, tests_dir, **settings))
+        best = elapsed if best is None else min(best, elapsed)
+    return best, output
+
+
+def main():
+    directory = tempfile.mkdtemp()
+    failed = False
+    try:
+        compiler, tests_dir = _corpus(directory)
+        print('{} test cases, {} jobs, {} CPUs'.format(SECTIONS * TESTS, JOBS, os.cpu_count()))
+        serial, serial_output = None, None
+        for name, settings in MODES:
+            elapsed, output = measure(directory, compiler, tests_dir, settings)
+            if serial is None:
+                serial, serial_output = elapsed, output
+            same = output == serial_output
+            print('{:26} {:.3f}s, speedup {:.2f}{}'.format(
+                name, elapsed, serial / elapsed, '' if same else ', OUTPUT DIFFERS FROM SERIAL RUN'
+            ))
+            failed = failed or not same
+    finally:
+        shutil.rmtree(directory)
+
+    if failed:
+        print('Output of concurrent run differs from serial one.', file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
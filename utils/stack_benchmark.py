@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# coding=utf-8
+import sys
+from os.path import abspath, dirname, join
+from timeit import timeit
+
+sys.path.insert(0, abspath(join(dirname(__file__), '..')))
+
+from ifj2017.interpreter.state import State
+
+DEPTH = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+SHALLOW_DEPTH = 1000
+POPS = 1000
+REPEAT = 5
+# pop at full depth can be slower only by constant factor, copying stacks grows linearly with depth
+MAX_RATIO = 5.
+
+
+def _data_stack(depth):
+    state = State()
+    state.data_stack.extend(range(depth))
+
+    def run():
+        for _ in range(POPS):
+            state.pop_stack()
+        state.data_stack.extend(range(POPS))
+
+    return run
+
+
+def _call_stack(depth):
+    state = State()
+    state.call_stack.extend(range(depth))
+
+    def run():
+        for _ in range(POPS):
+            state.return_()
+        state.call_stack.extend(range(POPS))
+
+    return run
+
+
+def _frame_stack(depth):
+    state = State()
+    state.frame_stack.extend({} for _ in range(depth))
+
+    def run():
+        for _ in range(POPS):
+            state.pop_frame()
+            state.push_frame()
+            state.pop_frame()
+        state.frame_stack.extend({} for _ in range(POPS))
+
+    return run
+
+
+def measure(factory, depth):
+    return min(timeit(factory(depth), number=1) for _ in range(REPEAT))
+
+
+def main():
+    failed = False
+    for name, factory in (
+            ('data stack', _data_stack),
+            ('call stack', _call_stack),
+            ('frame stack', _frame_stack),
+    ):
+        shallow = measure(factory, SHALLOW_DEPTH)
+        deep = measure(factory, DEPTH)
+        ratio = deep / shallow
+        print('{:12} depth {:7}: {:.6f}s, depth {:7}: {:.6f}s, ratio {:.2f}'.format(
+            name, SHALLOW_DEPTH, shallow, DEPTH, deep, ratio
+        ))
+        failed = failed or ratio > MAX_RATIO
+
+    if failed:
+        print('Stack operations are not O(1), ratio exceeded {}.'.format(MAX_RATIO), file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())